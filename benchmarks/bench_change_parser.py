@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Mikro-benchmark parseru popisů změn v rozvrhu.
+Porovná původní implementaci (tři nekompilované re.search na každé volání)
+s modulem change_parser (předkompilované vzory + LRU paměť) na korpusu
+popisů ve tvaru, v jakém je vrací Bakaláři API.
+
+Spuštění z kořene repozitáře:
+    python3 benchmarks/bench_change_parser.py [--lessons 20000] [--repeat 5]
+"""
+
+import argparse
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.bakalari_mcp_server import change_parser  # noqa: E402
+
+
+SUBJECTS = ["M", "Čj", "Aj", "Nj", "F", "Ch", "Bi", "D", "Z", "IT", "PCV", "TV", "Hv", "Vv", "ZSV"]
+TEACHERS = [
+    "Breginová Ivana", "Lipinová Ivana", "Czernek Pavel", "Hennhofer Dennis", "Novák Jan",
+    "Dvořáková Marie", "Procházka Tomáš", "Kučerová Eva", "Veselý Martin", "Horáková Lenka",
+    "Němec Petr", "Marková Jana", "Pokorný Jiří", "Pospíšilová Hana", "Hájek Ondřej",
+]
+ABBREVS = ["Tru", "Nov", "Dvo", "Pro", "Kuč", "Ves", "Hor", "Něm", "Mar", "Pok"]
+ROOMS = ["MMU", "M2", "U12", "U14", "TV1", "LabF", "LabCh", "IT1", "IT2", "Aula"]
+
+
+def legacy_parse(description):
+    """Původní implementace z server.py (před zavedením change_parser.py)"""
+    result = {}
+    if not description:
+        return result
+    spojeno_match = re.search(r'Spojeno:\s*([^,]+),\s*([^,]+),\s*([^(]+)', description)
+    if spojeno_match:
+        result['predmet'] = spojeno_match.group(1).strip()
+        result['ucitel'] = spojeno_match.group(2).strip()
+        result['mistnost'] = spojeno_match.group(3).strip()
+        return result
+    supl_match = re.search(r'Suplování:\s*([^(]+)\s*\(([^)]+)\)', description)
+    if supl_match:
+        result['ucitel'] = supl_match.group(1).strip()
+        return result
+    zruseno_match = re.search(r'Zrušeno\s*\(([^,]+),\s*([^)]+)\)', description)
+    if zruseno_match:
+        result['predmet'] = zruseno_match.group(1).strip()
+        result['ucitel'] = zruseno_match.group(2).strip()
+        return result
+    return result
+
+
+def build_corpus(lessons: int, seed: int = 42):
+    """
+    Popisy změněných hodin za více týdnů a studentů. Stejné suplování nebo zrušení
+    vidí všichni studenti třídy, popisy se proto ve velké míře opakují.
+    """
+    rng = random.Random(seed)
+    unique = []
+    for _ in range(400):
+        kind = rng.random()
+        if kind < 0.45:
+            unique.append(f"Suplování: {rng.choice(TEACHERS)} ({rng.choice(ABBREVS)})")
+        elif kind < 0.8:
+            unique.append(f"Zrušeno ({rng.choice(SUBJECTS)}, {rng.choice(TEACHERS)})")
+        elif kind < 0.95:
+            unique.append(
+                f"Spojeno: {rng.choice(SUBJECTS)}, {rng.choice(TEACHERS)}, {rng.choice(ROOMS)} "
+                f"({rng.choice(SUBJECTS)}, {rng.choice(TEACHERS)}, {rng.choice(ROOMS)})"
+            )
+        else:
+            unique.append(rng.choice(["Přesun hodiny", "Výměna místnosti", "Mimořádná událost"]))
+    return [rng.choice(unique) for _ in range(lessons)]
+
+
+def run(lessons: int, repeat: int) -> None:
+    corpus = build_corpus(lessons)
+
+    # Kontrola shody výsledků (nový parser navíc vrací puvodni_ucitel u suplování)
+    for description in set(corpus):
+        new = dict(change_parser.parse_change_description(description))
+        new.pop("puvodni_ucitel", None)
+        assert new == legacy_parse(description), description
+
+    def legacy():
+        for description in corpus:
+            legacy_parse(description)
+
+    def cold():
+        change_parser.parse_change_description.cache_clear()
+        for description in corpus:
+            change_parser.parse_change_description(description)
+
+    def warm():
+        for description in corpus:
+            change_parser.parse_change_description(description)
+
+    results = []
+    for name, fn in (("původní (re.search)", legacy), ("change_parser - studená paměť", cold), ("change_parser - teplá paměť", warm)):
+        best = min(timeit.repeat(fn, number=1, repeat=repeat))
+        results.append((name, best))
+
+    baseline = results[0][1]
+    print(f"Korpus: {len(corpus)} popisů, {len(set(corpus))} unikátních, opakování {repeat}x")
+    for name, best in results:
+        print(f"  {name:32s} {best * 1000:8.2f} ms  {best / len(corpus) * 1e9:8.0f} ns/popis  {baseline / best:5.1f}x")
+    print(f"  paměť parseru: {change_parser.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parseru popisů změn v rozvrhu")
+    parser.add_argument("--lessons", type=int, default=20000, help="Počet popisů v korpusu")
+    parser.add_argument("--repeat", type=int, default=5, help="Počet opakování měření")
+    args = parser.parse_args()
+    run(args.lessons, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
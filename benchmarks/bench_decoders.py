@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Mikro-benchmark dekodérů odpovědí na datech velké školy (viz payloads.py).
+Pro rozvrh, stálý rozvrh, známky a absence měří zvlášť tři fáze:
+
+    dekodovani  - JSON odpovědi -> model (json_backend.loads + MODEL_PARSERS)
+    nastroj     - sestavení výsledku nástroje z modelu v cache odpovědí
+    serializace - výsledek nástroje -> JSON text (json_backend.dumps)
+
+Časy jsou minimum a medián z --repeat opakování. Alokace se měří v samostatném
+běhu pod tracemalloc: špička paměti během fáze a paměť, která po fázi zůstane
+(např. model v cache). Nástroj rozvrh běží s vypnutou cache dekódovaných týdnů,
+aby se měřilo dekódování týdne, ne jen vyhledání dne.
+
+Výsledky lze uložit (--json) a porovnat s dřívějším během (--compare); při
+zpomalení nebo nárůstu paměti nad --tolerance skončí skript kódem 1.
+
+Spuštění z kořene repozitáře:
+    python3 benchmarks/bench_decoders.py [--subjects 60] [--marks 300] [--hours 10]
+                                         [--repeat 20] [--json zaklad.json] [--compare zaklad.json]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import payloads  # noqa: E402
+from src.bakalari_mcp_server import core, json_backend  # noqa: E402
+from src.bakalari_mcp_server.models import MODEL_PARSERS  # noqa: E402
+
+URL = "http://bench.invalid"
+MONDAY = "2025-05-12"
+
+# Dekodér -> (endpoint, rodina endpointu, soubor z payloads.school, volání nástroje)
+DECODERS: Dict[str, Any] = {
+    "rozvrh": (f"/api/3/timetable/actual?date={MONDAY}", "rozvrh", "timetable_actual",
+               lambda: core.rozvrh(datum=MONDAY)),
+    "staly_rozvrh": ("/api/3/timetable/permanent", "staly_rozvrh", "timetable_permanent",
+                     lambda: core.staly_rozvrh()),
+    "znamky": ("/api/3/marks", "znamky", "marks", lambda: core.znamky()),
+    "absence": ("/api/3/absence/student", "absence", "absence", lambda: core.absence()),
+}
+STAGES = ("dekodovani", "nastroj", "serializace")
+
+
+async def measure(fn: Callable[[], Awaitable[Any]], repeat: int) -> Dict[str, float]:
+    """Časy (ms) a alokace (KiB) jedné fáze"""
+    await fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = await fn()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {
+        "min_ms": round(min(times) * 1000, 3),
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "spicka_kib": round((peak - before) / 1024, 1),
+        "zustava_kib": round((after - before) / 1024, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    school = payloads.school(args.subjects, args.marks, args.hours, args.groups, args.absence_days, args.seed)
+    bodies = {name: json.dumps(data, ensure_ascii=False).encode("utf-8") for name, data in school.items()}
+
+    core.default_url, core.default_user, core.default_password = URL, "bench", "bench"
+    client = await core.get_client()
+    # Každé volání nástroje rozvrh dekóduje celý týden
+    client.weeks.enabled = False
+    # Odpovědi větší než limit cache účtu (BAKALARI_ACCOUNT_CACHE_MAX_BYTES) by se
+    # necachovaly a nástroj by se pokusil o požadavek na server
+    account_limit = client.cache.max_bytes
+    client.cache.max_bytes = max(account_limit, sum(map(len, bodies.values())))
+    for name, body in bodies.items():
+        if len(body) > account_limit:
+            print(
+                f"Pozor: {name} má {len(body) / 1024:.0f} KiB, víc než limit cache účtu "
+                f"{account_limit / 1024:.0f} KiB - na serveru by se necachoval",
+                file=sys.stderr,
+            )
+
+    results: Dict[str, Any] = {}
+    try:
+        for name in args.decoders:
+            endpoint, family, payload, call = DECODERS[name]
+            body = bodies[payload]
+            parser = MODEL_PARSERS[family]
+            # Model v cache odpovědí - nástroj pak nepotřebuje server ani přihlášení
+            await client.store_payload(endpoint, body, {})
+            output = await call()
+            if "error" in output:
+                raise RuntimeError(f"{name}: {output['error']}")
+
+            async def decode():
+                return parser(json_backend.loads(body))
+
+            async def serialize():
+                return json_backend.dumps(output)
+
+            results[name] = {
+                "odpoved_kib": round(len(body) / 1024, 1),
+                "vystup_kib": round(len(json_backend.dumps(output).encode("utf-8")) / 1024, 1),
+                "dekodovani": await measure(decode, args.repeat),
+                "nastroj": await measure(call, args.repeat),
+                "serializace": await measure(serialize, args.repeat),
+            }
+    finally:
+        await core.registry.close()
+    return results
+
+
+def report(results: Dict[str, Any], args: argparse.Namespace) -> None:
+    print(
+        f"Velká škola: {args.subjects} předmětů, {args.marks} známek/předmět, {args.hours} hodin × {args.groups} skupiny, "
+        f"absence za {args.absence_days} dní; JSON backend {json_backend.BACKEND}, opakování {args.repeat}x"
+    )
+    print(f"  {'dekodér':13s} {'fáze':12s} {'min ms':>9s} {'medián ms':>10s} {'špička KiB':>11s} {'zůstává KiB':>12s}")
+    for name, row in results.items():
+        print(f"  {name:13s} odpověď {row['odpoved_kib']:.0f} KiB, výstup {row['vystup_kib']:.0f} KiB")
+        for stage in STAGES:
+            m = row[stage]
+            print(
+                f"  {'':13s} {stage:12s} {m['min_ms']:9.2f} {m['median_ms']:10.2f} "
+                f"{m['spicka_kib']:11.1f} {m['zustava_kib']:12.1f}"
+            )
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> bool:
+    """Porovná minima časů a špičky paměti se základem; vrátí True při regresi"""
+    regressed = False
+    print(f"\nPorovnání se základem (tolerance {tolerance:.0%}):")
+    for name, row in results.items():
+        for stage in STAGES:
+            base = baseline.get(name, {}).get(stage)
+            if not base:
+                continue
+            for metric in ("min_ms", "spicka_kib"):
+                old, new = base[metric], row[stage][metric]
+                if not old:
+                    continue
+                change = new / old - 1
+                flag = ""
+                if change > tolerance:
+                    flag = "  REGRESE"
+                    regressed = True
+                print(f"  {name:13s} {stage:12s} {metric:11s} {old:10.2f} -> {new:10.2f} ({change:+.0%}){flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dekodérů odpovědí na datech velké školy")
+    parser.add_argument("--subjects", type=int, default=60, help="Počet předmětů")
+    parser.add_argument("--marks", type=int, default=300, help="Počet známek na předmět")
+    parser.add_argument("--hours", type=int, default=10, help="Počet hodin ve dni")
+    parser.add_argument("--groups", type=int, default=3, help="Počet dělených skupin v každé hodině")
+    parser.add_argument("--absence-days", type=int, default=365, help="Počet kalendářních dní absencí")
+    parser.add_argument("--decoders", default=",".join(DECODERS), help="Čárkou oddělený seznam dekodérů")
+    parser.add_argument("--repeat", type=int, default=20, help="Počet opakování měření")
+    parser.add_argument("--seed", type=int, default=1, help="Seed generátoru dat")
+    parser.add_argument("--json", help="Uloží výsledky do JSON souboru")
+    parser.add_argument("--compare", help="JSON s výsledky dřívějšího běhu pro porovnání")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Povolené zhoršení proti základu (0.2 = 20 %%)")
+    args = parser.parse_args()
+    args.decoders = [name.strip() for name in args.decoders.split(",") if name.strip()]
+    unknown = [name for name in args.decoders if name not in DECODERS]
+    if unknown:
+        parser.error(f"neznámé dekodéry: {', '.join(unknown)}")
+
+    results = asyncio.run(run(args))
+    report(results, args)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
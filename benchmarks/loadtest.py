@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+End-to-end zátěžový test MCP serveru proti lokálnímu mocku Bakalářů.
+Spustí mock_bakalari.py, potom MCP server (stdio nebo HTTP transport) a N
+souběžných MCP klientů, kteří volají nástroje. Pro každý nástroj vypíše
+počet volání, chyby, latence p50/p95/p99 a počet volání za sekundu.
+
+U stdio má každý klient vlastní proces serveru (tak jako v MCP klientech),
+u HTTP sdílí všichni klienti jeden server a přihlašují se hlavičkami
+X-Bakalari-* (--accounts určuje počet různých účtů).
+
+Limity zátěže serveru školy (BAKALARI_RATE_LIMIT atd.) platí i proti mocku;
+pro měření propustnosti samotného serveru je lze vypnout přes --server-env.
+
+Spuštění z kořene repozitáře:
+    python3 benchmarks/loadtest.py [--transport both] [--clients 10] [--requests 50]
+                                   [--tools rozvrh,znamky,prehled] [--latency 50]
+                                   [--server-env BAKALARI_RATE_LIMIT=0] [--json vysledky.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastmcp import Client
+from fastmcp.client.transports import PythonStdioTransport, StreamableHttpTransport
+
+ROOT = Path(__file__).resolve().parent.parent
+MOCK = Path(__file__).resolve().parent / "mock_bakalari.py"
+
+TOOLS = ("rozvrh", "staly_rozvrh", "znamky", "absence", "prehled")
+PASSWORD = "heslo"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 20.0) -> None:
+    """Počká, až proces začne přijímat spojení na portu"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Proces {process.args} skončil s kódem {process.returncode}")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Port {port} neodpovídá ani po {timeout} s")
+
+
+def school_days(weeks: int) -> List[str]:
+    """Pracovní dny aktuálního a předchozích týdnů (pro parametr datum)"""
+    monday = date.today() - timedelta(days=date.today().weekday())
+    return [
+        (monday - timedelta(weeks=week) + timedelta(days=day)).isoformat()
+        for week in range(weeks)
+        for day in range(5)
+    ]
+
+
+def tool_arguments(tool: str, rng: random.Random, days: List[str], refresh_ratio: float) -> Dict[str, Any]:
+    arguments: Dict[str, Any] = {}
+    if tool in ("rozvrh", "prehled"):
+        arguments["datum"] = rng.choice(days)
+    if refresh_ratio and rng.random() < refresh_ratio:
+        arguments["obnovit"] = True
+    return arguments
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil metodou nejbližšího pořadí (values musí být seřazené)"""
+    if not values:
+        return 0.0
+    index = max(int(round(q / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+class Recorder:
+    """Latence a chyby volání podle nástroje"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.error_samples: Dict[str, str] = {}
+
+    def record(self, tool: str, latency: float, error: Optional[str]) -> None:
+        self.latencies[tool].append(latency)
+        if error is not None:
+            self.errors[tool] += 1
+            self.error_samples.setdefault(tool, error[:200])
+
+    def report(self, title: str, elapsed: float) -> Dict[str, Any]:
+        rows = {}
+        for tool in sorted(self.latencies):
+            values = sorted(self.latencies[tool])
+            rows[tool] = {
+                "volani": len(values),
+                "chyby": self.errors[tool],
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "volani_za_s": round(len(values) / elapsed, 1) if elapsed else 0.0,
+            }
+        total = sum(len(values) for values in self.latencies.values())
+
+        print(f"\n{title}: {total} volání za {elapsed:.2f} s ({total / elapsed if elapsed else 0:.1f} volání/s)")
+        print(f"  {'nástroj':14s} {'volání':>7s} {'chyby':>6s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'volání/s':>9s}")
+        for tool, row in rows.items():
+            print(
+                f"  {tool:14s} {row['volani']:7d} {row['chyby']:6d} {row['p50_ms']:9.2f} "
+                f"{row['p95_ms']:9.2f} {row['p99_ms']:9.2f} {row['volani_za_s']:9.1f}"
+            )
+        for tool, sample in self.error_samples.items():
+            print(f"  ukázka chyby {tool}: {sample}")
+        return {"celkem_volani": total, "doba_s": round(elapsed, 3), "nastroje": rows}
+
+
+async def call_tool(client: Client, tool: str, arguments: Dict[str, Any]) -> Optional[str]:
+    """Zavolá nástroj, vrátí text chyby nebo None"""
+    try:
+        result = await client.call_tool(tool, arguments, raise_on_error=False)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    data = result.structured_content
+    if result.is_error:
+        return str(result.content)
+    if isinstance(data, dict) and "error" in data:
+        return str(data["error"])
+    return None
+
+
+async def drive(clients: List[Client], args: argparse.Namespace, title: str) -> Dict[str, Any]:
+    """Zahřátí (nezapočítá se) a vlastní měření nad už připojenými klienty"""
+    tools = args.tools
+    days = school_days(args.weeks)
+    recorder = Recorder()
+
+    async def warmup(client: Client) -> None:
+        for tool in tools:
+            await call_tool(client, tool, tool_arguments(tool, random.Random(), days, 0))
+
+    async def worker(index: int, client: Client) -> None:
+        rng = random.Random(args.seed + index)
+        for _ in range(args.requests):
+            tool = rng.choice(tools)
+            arguments = tool_arguments(tool, rng, days, args.refresh_ratio)
+            start = time.perf_counter()
+            error = await call_tool(client, tool, arguments)
+            recorder.record(tool, time.perf_counter() - start, error)
+
+    await asyncio.gather(*[warmup(client) for client in clients])
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(index, client) for index, client in enumerate(clients)])
+    return recorder.report(title, time.perf_counter() - start)
+
+
+def server_env(args: argparse.Namespace) -> Dict[str, str]:
+    env = {key: value for key, value in os.environ.items() if key.startswith("BAKALARI_")}
+    for item in args.server_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+async def run_stdio(args: argparse.Namespace, mock_url: str) -> Dict[str, Any]:
+    env = dict(server_env(args), PYTHONPATH=str(ROOT))
+    async with AsyncExitStack() as stack:
+        clients = []
+        for index in range(args.clients):
+            transport = PythonStdioTransport(
+                ROOT / "main.py",
+                args=["--user", f"student{index % args.accounts}", "--password", PASSWORD, "--url", mock_url],
+                env=env,
+                cwd=str(ROOT),
+                log_file=Path(os.devnull),
+            )
+            clients.append(await stack.enter_async_context(Client(transport)))
+        return await drive(clients, args, f"stdio ({args.clients} klientů = {args.clients} procesů serveru)")
+
+
+async def run_http(args: argparse.Namespace, mock_url: str) -> Dict[str, Any]:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, str(ROOT / "main_http.py"), "--host", "127.0.0.1", "--port", str(port), "--url", mock_url],
+        cwd=str(ROOT),
+        env=dict(os.environ, **server_env(args)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        await wait_for_port(port, server)
+        async with AsyncExitStack() as stack:
+            clients = []
+            for index in range(args.clients):
+                transport = StreamableHttpTransport(
+                    f"http://127.0.0.1:{port}/mcp",
+                    headers={
+                        "X-Bakalari-User": f"student{index % args.accounts}",
+                        "X-Bakalari-Password": PASSWORD,
+                        "X-Bakalari-Url": mock_url,
+                    },
+                )
+                clients.append(await stack.enter_async_context(Client(transport)))
+            return await drive(clients, args, f"http ({args.clients} klientů, {args.accounts} účtů, 1 proces serveru)")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    mock_port = free_port()
+    mock_args = [
+        sys.executable, str(MOCK), "--port", str(mock_port),
+        "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate), "--token-ttl", str(args.token_ttl),
+        "--seed", str(args.seed),
+    ]
+    if args.fixtures:
+        mock_args += ["--fixtures", args.fixtures]
+    mock = subprocess.Popen(mock_args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    results: Dict[str, Any] = {}
+    try:
+        await wait_for_port(mock_port, mock)
+        print(
+            f"Mock Bakaláři: latence {args.latency:g}±{args.jitter:g} ms, chybovost {args.error_rate:g}, "
+            f"platnost tokenu {args.token_ttl:g} s; nástroje: {', '.join(args.tools)}"
+        )
+        if args.transport in ("stdio", "both"):
+            results["stdio"] = await run_stdio(args, mock_url)
+        if args.transport in ("http", "both"):
+            results["http"] = await run_http(args, mock_url)
+    finally:
+        mock.terminate()
+        mock.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zátěžový test MCP serveru proti mocku Bakalářů")
+    parser.add_argument("--transport", choices=["stdio", "http", "both"], default="both", help="Měřený transport")
+    parser.add_argument("--clients", type=int, default=10, help="Počet souběžných MCP klientů")
+    parser.add_argument("--requests", type=int, default=50, help="Počet volání na klienta")
+    parser.add_argument("--accounts", type=int, default=1, help="Počet různých účtů (studentů)")
+    parser.add_argument("--tools", default=",".join(TOOLS), help="Čárkou oddělený seznam volaných nástrojů")
+    parser.add_argument("--weeks", type=int, default=2, help="Z kolika týdnů se vybírá datum rozvrhu")
+    parser.add_argument("--refresh-ratio", type=float, default=0.0, help="Podíl volání s obnovit=true (obejití cache)")
+    parser.add_argument("--latency", type=float, default=50.0, help="Latence mocku (ms)")
+    parser.add_argument("--jitter", type=float, default=10.0, help="Rozptyl latence mocku ± (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Podíl odpovědí 503 z mocku (0-1)")
+    parser.add_argument("--token-ttl", type=float, default=3600.0, help="Platnost tokenu v mocku (s)")
+    parser.add_argument("--fixtures", help="Adresář s fixtures pro mock (výchozí benchmarks/fixtures)")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KLÍČ=HODNOTA",
+                        help="Proměnná prostředí pro MCP server (lze opakovat)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed výběru nástrojů a dat")
+    parser.add_argument("--json", help="Uloží výsledky do JSON souboru")
+    args = parser.parse_args()
+    args.tools = [tool.strip() for tool in args.tools.split(",") if tool.strip()]
+
+    results = asyncio.run(run(args))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Lokální náhrada serveru Bakaláři v3 pro zátěžové testy a vývoj bez skutečné školy.
+Obsluhuje /api/login, /api/3/timetable/actual, /api/3/timetable/permanent,
+/api/3/marks a /api/3/absence/student z fixtures (adresář benchmarks/fixtures).
+Aktuální rozvrh se posune do týdne podle parametru date, takže funguje
+pro libovolné datum.
+
+Nastavitelná je latence odpovědí, podíl chybových odpovědí (503) a platnost
+tokenů - po jejím vypršení server odpovídá 401 a klient musí token obnovit.
+Počty požadavků podle endpointu a stavového kódu vrací GET /mock/stats.
+
+Spuštění z kořene repozitáře:
+    python3 benchmarks/mock_bakalari.py [--port 18800] [--latency 50] [--jitter 20]
+                                        [--error-rate 0.01] [--token-ttl 3600]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import time
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from aiohttp import web
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# Endpoint -> soubor fixture
+FIXTURE_FILES = {
+    "/api/3/timetable/actual": "timetable_actual.json",
+    "/api/3/timetable/permanent": "timetable_permanent.json",
+    "/api/3/marks": "marks.json",
+    "/api/3/absence/student": "absence.json",
+}
+
+
+class MockBakalari:
+    """Stav mock serveru: fixtures, vydané tokeny a počítadla požadavků"""
+
+    def __init__(
+        self,
+        fixtures_dir: Path = FIXTURES_DIR,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        token_ttl: float = 3600.0,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        seed: Optional[int] = None,
+    ):
+        self.fixtures = {
+            endpoint: json.loads((fixtures_dir / name).read_text(encoding="utf-8"))
+            for endpoint, name in FIXTURE_FILES.items()
+        }
+        # Odpovědi bez posunu data se serializují jen jednou
+        self.bodies = {endpoint: json.dumps(data, ensure_ascii=False) for endpoint, data in self.fixtures.items()}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        self.username = username
+        self.password = password
+        self.rng = random.Random(seed)
+        self.tokens: Dict[str, float] = {}
+        self.refresh_tokens: Dict[str, str] = {}
+        self.counters: Counter = Counter()
+
+    async def delay(self) -> None:
+        wait = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def issue_token(self, user: str) -> Dict[str, Any]:
+        now = time.monotonic()
+        if len(self.tokens) > 10000:
+            self.tokens = {token: expires_at for token, expires_at in self.tokens.items() if expires_at > now}
+        access = secrets.token_hex(16)
+        refresh = secrets.token_hex(16)
+        self.tokens[access] = now + self.token_ttl
+        self.refresh_tokens[refresh] = user
+        return {
+            "access_token": access,
+            "refresh_token": refresh,
+            "expires_in": int(self.token_ttl),
+            "token_type": "Bearer",
+        }
+
+    def authorized(self, request: web.Request) -> bool:
+        header = request.headers.get("Authorization", "")
+        expires_at = self.tokens.get(header[len("Bearer "):]) if header.startswith("Bearer ") else None
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def count(self, path: str, status: int) -> None:
+        self.counters[f"{path} {status}"] += 1
+
+    async def login(self, request: web.Request) -> web.Response:
+        await self.delay()
+        form = await request.post()
+        grant = form.get("grant_type")
+        if grant == "password":
+            if self.username and (form.get("username") != self.username or form.get("password") != self.password):
+                self.count(request.path, 400)
+                return web.json_response(
+                    {"error": "invalid_grant", "error_description": "Špatné jméno nebo heslo"}, status=400
+                )
+            self.count(request.path, 200)
+            return web.json_response(self.issue_token(form.get("username", "")))
+        if grant == "refresh_token":
+            user = self.refresh_tokens.pop(form.get("refresh_token", ""), None)
+            if user is None:
+                self.count(request.path, 400)
+                return web.json_response({"error": "invalid_grant", "error_description": "Neplatný refresh token"}, status=400)
+            self.count(request.path, 200)
+            return web.json_response(self.issue_token(user))
+        self.count(request.path, 400)
+        return web.json_response({"error": "unsupported_grant_type"}, status=400)
+
+    def actual_body(self, requested: Optional[str]) -> str:
+        """Aktuální rozvrh přesunutý do týdne zadaného data"""
+        try:
+            day = date.fromisoformat(requested[:10]) if requested else date.today()
+        except ValueError:
+            day = date.today()
+        monday = day - timedelta(days=day.weekday())
+        data = dict(self.fixtures["/api/3/timetable/actual"])
+        data["Days"] = [
+            dict(d, Date=f"{monday + timedelta(days=d['DayOfWeek'] - 1)}T00:00:00+02:00")
+            for d in data["Days"]
+        ]
+        return json.dumps(data, ensure_ascii=False)
+
+    async def api(self, request: web.Request) -> web.Response:
+        await self.delay()
+        if not self.authorized(request):
+            self.count(request.path, 401)
+            return web.Response(status=401)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.count(request.path, 503)
+            return web.Response(status=503, text="Service Unavailable")
+        if request.path == "/api/3/timetable/actual":
+            body = self.actual_body(request.query.get("date"))
+        else:
+            body = self.bodies[request.path]
+        self.count(request.path, 200)
+        return web.Response(text=body, content_type="application/json")
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"pozadavky": dict(self.counters), "platne_tokeny": len(self.tokens)})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/login", self.login)
+        for endpoint in FIXTURE_FILES:
+            app.router.add_get(endpoint, self.api)
+        app.router.add_get("/mock/stats", self.stats)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock server Bakaláři v3 API")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=18800, help="Port to bind to")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR, help="Adresář s JSON fixtures")
+    parser.add_argument("--latency", type=float, default=0.0, help="Průměrná latence odpovědi (ms)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Náhodný rozptyl latence ± (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Podíl odpovědí 503 (0-1)")
+    parser.add_argument("--token-ttl", type=float, default=3600.0, help="Platnost access tokenu (s)")
+    parser.add_argument("--user", help="Vyžadované uživatelské jméno (jinak se přijme libovolné)")
+    parser.add_argument("--password", help="Vyžadované heslo")
+    parser.add_argument("--seed", type=int, help="Seed generátoru latencí a chyb")
+    args = parser.parse_args()
+
+    mock = MockBakalari(
+        fixtures_dir=args.fixtures,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        token_ttl=args.token_ttl,
+        username=args.user,
+        password=args.password,
+        seed=args.seed,
+    )
+    print(f"Mock Bakaláři na http://{args.host}:{args.port} (fixtures: {args.fixtures})", flush=True)
+    web.run_app(mock.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
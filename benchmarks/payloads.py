@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Generátor syntetických odpovědí Bakaláři v3 API ve velikosti velké školy.
+Tvar dat odpovídá skutečným odpovědím (a fixtures v benchmarks/fixtures),
+velikost se nastavuje parametry - např. 60 předmětů, 300 známek na předmět,
+10hodinový den s dělenými skupinami nebo absence za celý školní rok.
+Výstup je deterministický (seed).
+
+Použití jako modul (bench_decoders.py) nebo pro vytvoření fixtures pro mock:
+    python3 benchmarks/payloads.py --out /tmp/velka_skola [--subjects 60] [--marks 300]
+    python3 benchmarks/mock_bakalari.py --fixtures /tmp/velka_skola
+"""
+
+import argparse
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+FIRST_NAMES = ["Jan", "Marie", "Tomáš", "Eva", "Martin", "Lenka", "Petr", "Jana", "Jiří", "Hana", "Ondřej", "Ivana"]
+LAST_NAMES = ["Novák", "Dvořák", "Procházka", "Kučera", "Veselý", "Horák", "Němec", "Marek", "Pokorný", "Hájek", "Král", "Beneš"]
+SUBJECT_NAMES = [
+    "Český jazyk a literatura", "Matematika", "Anglický jazyk", "Německý jazyk", "Fyzika", "Chemie",
+    "Biologie", "Dějepis", "Zeměpis", "Informatika", "Tělesná výchova", "Základy společenských věd",
+]
+CAPTIONS = ["Písemná práce", "Test", "Ústní zkoušení", "Domácí úkol", "Referát", "Čtvrtletní práce", "Laboratorní protokol"]
+THEMES = ["Opakování", "Test", "Slohová práce", "Laboratorní práce", "Procvičování", "Nová látka", ""]
+MARK_TEXTS = ["1", "1", "2", "2", "3", "4", "5", "1-", "2-", "3-"]
+
+
+def _subjects(count: int) -> List[Dict[str, Any]]:
+    subjects = []
+    for index in range(count):
+        base = SUBJECT_NAMES[index % len(SUBJECT_NAMES)]
+        suffix = f" {index // len(SUBJECT_NAMES) + 1}" if index >= len(SUBJECT_NAMES) else ""
+        subjects.append({"Id": f"{index + 1:2d}", "Abbrev": f"{base[:2]}{index}", "Name": base + suffix})
+    return subjects
+
+
+def _teachers(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    teachers = []
+    for index in range(count):
+        last = LAST_NAMES[index % len(LAST_NAMES)]
+        first = rng.choice(FIRST_NAMES)
+        teachers.append({"Id": f"UZ{index:04d}", "Abbrev": f"{last[:3]}{index}", "Name": f"{last} {first}"})
+    return teachers
+
+
+def _hours(count: int) -> List[Dict[str, Any]]:
+    hours = []
+    start = 8 * 60
+    for index in range(count):
+        begin = start + index * 55
+        end = begin + 45
+        hours.append({
+            "Id": index + 2,
+            "Caption": str(index + 1),
+            "BeginTime": f"{begin // 60}:{begin % 60:02d}",
+            "EndTime": f"{end // 60}:{end % 60:02d}",
+        })
+    return hours
+
+
+def timetable(
+    subjects: int = 60,
+    hours: int = 10,
+    groups: int = 3,
+    teachers: int = 80,
+    rooms: int = 40,
+    change_ratio: float = 0.1,
+    permanent: bool = False,
+    monday: date = date(2025, 5, 12),
+    seed: int = 1,
+) -> Dict[str, Any]:
+    """
+    Týden rozvrhu: každý den má `hours` hodin a v každé hodině `groups` atomů
+    (dělené skupiny). Aktuální rozvrh obsahuje změny (zrušení, suplování) v podílu
+    change_ratio, stálý rozvrh (permanent) je bez dat a bez změn.
+    """
+    rng = random.Random(seed)
+    subject_list = _subjects(subjects)
+    teacher_list = _teachers(teachers, rng)
+    room_list = [{"Id": f"R{index}", "Abbrev": f"U{index:02d}", "Name": f"Učebna {index}"} for index in range(rooms)]
+    group_list = [{"Id": f"G{index}", "Abbrev": f"{index + 1}.sk", "Name": f"Skupina {index + 1}", "ClassId": "C1"}
+                  for index in range(groups)]
+    hour_list = _hours(hours)
+    teacher_of = {subject["Id"]: teacher_list[index % teachers] for index, subject in enumerate(subject_list)}
+
+    days = []
+    for day_index in range(5):
+        atoms = []
+        for hour in hour_list:
+            for group in group_list:
+                subject = rng.choice(subject_list)
+                teacher = teacher_of[subject["Id"]]
+                atom = {
+                    "HourId": hour["Id"],
+                    "GroupIds": [group["Id"]],
+                    "SubjectId": subject["Id"],
+                    "TeacherId": teacher["Id"],
+                    "RoomId": rng.choice(room_list)["Id"],
+                    "CycleIds": ["1"],
+                    "Change": None,
+                    "HomeworkIds": [],
+                    "Theme": "" if permanent else rng.choice(THEMES),
+                }
+                roll = rng.random()
+                if not permanent and roll < change_ratio / 2:
+                    atom.update(SubjectId=None, TeacherId=None, RoomId=None)
+                    atom["Change"] = {
+                        "ChangeSubject": None, "Day": None, "Hours": hour["Caption"], "ChangeType": "Canceled",
+                        "Description": f"Zrušeno ({subject['Abbrev']}, {teacher['Name']})",
+                        "Time": "", "TypeAbbrev": None, "TypeName": None,
+                    }
+                elif not permanent and roll < change_ratio:
+                    substitute = rng.choice(teacher_list)
+                    atom["TeacherId"] = substitute["Id"]
+                    atom["Change"] = {
+                        "ChangeSubject": None, "Day": None, "Hours": hour["Caption"], "ChangeType": "Substitution",
+                        "Description": f"Suplování: {substitute['Name']} ({teacher['Abbrev']})",
+                        "Time": "", "TypeAbbrev": None, "TypeName": None,
+                    }
+                atoms.append(atom)
+        days.append({
+            "DayOfWeek": day_index + 1,
+            "Date": None if permanent else f"{monday + timedelta(days=day_index)}T00:00:00+02:00",
+            "DayDescription": "",
+            "DayType": "WorkDay",
+            "Atoms": atoms,
+        })
+
+    return {
+        "Hours": hour_list,
+        "Classes": [{"Id": "C1", "Abbrev": "3.A", "Name": "3.A"}],
+        "Groups": group_list,
+        "Subjects": subject_list,
+        "Teachers": teacher_list,
+        "Rooms": room_list,
+        "Cycles": [{"Id": "1", "Abbrev": "K", "Name": "Každý týden"}],
+        "Days": days,
+    }
+
+
+def marks(subjects: int = 60, marks_per_subject: int = 300, teachers: int = 80, seed: int = 1) -> Dict[str, Any]:
+    """Známky za školní rok: `marks_per_subject` známek v každém z `subjects` předmětů"""
+    rng = random.Random(seed)
+    teacher_list = _teachers(teachers, rng)
+    start = date(2024, 9, 2)
+    result = []
+    mark_id = 1
+    for index, subject in enumerate(_subjects(subjects)):
+        subject_marks = []
+        for _ in range(marks_per_subject):
+            day = start + timedelta(days=rng.randint(0, 290))
+            subject_marks.append({
+                "MarkDate": f"{day}T00:00:00+01:00",
+                "EditDate": f"{day}T{rng.randint(8, 15):02d}:{rng.randint(0, 59):02d}:00+01:00",
+                "Caption": rng.choice(CAPTIONS),
+                "Theme": rng.choice(THEMES),
+                "MarkText": rng.choice(MARK_TEXTS),
+                "IsInvalidDate": False,
+                "TeacherId": teacher_list[index % teachers]["Id"],
+                "Type": "A",
+                "TypeNote": "",
+                "Weight": rng.choice([1, 2, 3, 5]),
+                "SubjectId": subject["Id"],
+                "IsNew": rng.random() < 0.02,
+                "IsPoints": False,
+                "CalculatedMarkText": "",
+                "ClassRankText": None,
+                "Id": f"A{mark_id:07d}",
+                "PointsText": "",
+                "MaxPoints": 0,
+            })
+            mark_id += 1
+        result.append({
+            "Marks": subject_marks,
+            "Subject": subject,
+            "AverageText": f"{rng.uniform(1, 3):.2f}".replace(".", ","),
+            "TemporaryMark": "",
+            "SubjectNote": "",
+            "TemporaryMarkNote": "",
+            "PointsOnly": False,
+            "MarkPredictionEnabled": True,
+        })
+    return {"Subjects": result, "MarkOptions": [{"Id": str(i), "Abbrev": str(i), "Name": str(i)} for i in range(1, 6)]}
+
+
+def absence(days: int = 365, subjects: int = 60, seed: int = 1) -> Dict[str, Any]:
+    """Absence za `days` kalendářních dní (záznam za každý pracovní den) a `subjects` předmětů"""
+    rng = random.Random(seed)
+    start = date(2024, 9, 2)
+    records = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        records.append({
+            "Date": f"{day}T00:00:00+01:00",
+            "Unsolved": rng.choice([0, 0, 0, 0, 1]),
+            "Ok": rng.choice([0, 0, 0, 1, 2, 6]),
+            "Missed": rng.choice([0, 0, 0, 0, 1]),
+            "Late": rng.choice([0, 0, 0, 0, 0, 1]),
+            "Soon": rng.choice([0, 0, 0, 0, 0, 1]),
+            "School": rng.choice([0, 0, 0, 2]),
+            "DistanceTeaching": 0,
+        })
+    return {
+        "PercentageThreshold": 0.25,
+        "Absences": records,
+        "AbsencesPerSubject": [
+            {
+                "SubjectName": subject["Name"],
+                "LessonsCount": rng.randint(30, 160),
+                "Base": rng.randint(0, 20),
+                "Late": rng.randint(0, 3),
+                "Soon": rng.randint(0, 2),
+                "School": rng.randint(0, 5),
+                "DistanceTeaching": 0,
+            }
+            for subject in _subjects(subjects)
+        ],
+    }
+
+
+def school(subjects: int = 60, marks_per_subject: int = 300, hours: int = 10, groups: int = 3,
+           absence_days: int = 365, seed: int = 1) -> Dict[str, Dict[str, Any]]:
+    """Všechny čtyři odpovědi velké školy pojmenované jako soubory fixtures"""
+    return {
+        "timetable_actual": timetable(subjects, hours, groups, seed=seed),
+        "timetable_permanent": timetable(subjects, hours, groups, permanent=True, seed=seed),
+        "marks": marks(subjects, marks_per_subject, seed=seed),
+        "absence": absence(absence_days, subjects, seed=seed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generátor syntetických odpovědí Bakaláři API")
+    parser.add_argument("--out", type=Path, required=True, help="Adresář pro JSON soubory (fixtures)")
+    parser.add_argument("--subjects", type=int, default=60, help="Počet předmětů")
+    parser.add_argument("--marks", type=int, default=300, help="Počet známek na předmět")
+    parser.add_argument("--hours", type=int, default=10, help="Počet hodin ve dni")
+    parser.add_argument("--groups", type=int, default=3, help="Počet dělených skupin v každé hodině")
+    parser.add_argument("--absence-days", type=int, default=365, help="Počet kalendářních dní absencí")
+    parser.add_argument("--seed", type=int, default=1, help="Seed generátoru")
+    args = parser.parse_args()
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    for name, data in school(args.subjects, args.marks, args.hours, args.groups, args.absence_days, args.seed).items():
+        path = args.out / f"{name}.json"
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        print(f"{path}: {path.stat().st_size / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
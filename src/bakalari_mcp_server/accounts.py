@@ -0,0 +1,223 @@
+"""
+Registr účtů pro HTTP server.
+Jeden proces tak může obsluhovat více studentů (i z různých škol) - každý účet
+má vlastního klienta s tokeny, HTTP poolem a cache. Nečinné účty se uvolňují
+podle LRU a časového limitu, takže paměť zůstává omezená.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Set, Iterable
+from urllib import parse
+
+from .client import BakalariClient, account_key, normalize_url
+from .breaker import ServerBreakers
+from .disk_cache import DiskCache
+from .errors import BakalariAuthError, BakalariAPIError
+from .ratelimit import ServerLimiters
+from .singleflight import SingleFlight
+
+
+DEFAULT_ACCOUNT_CACHE_MAX_BYTES = 4 * 1024 * 1024
+
+
+def server_host(url: str) -> str:
+    """Host (a port) serveru pro porovnání s povolenými servery"""
+    return parse.urlsplit(normalize_url(url.strip())).netloc.lower()
+
+
+class AllowedServers:
+    """
+    Servery, na které smí klient poslat požadavek přes hlavičku X-Bakalari-Url.
+    Položky jsou hosty nebo URL, "*.domena.cz" povolí subdomény a "*" cokoli.
+    Výchozí server z příkazové řádky je povolen vždy.
+    """
+
+    def __init__(self, entries: Iterable[str] = ()):
+        self.any = False
+        self.hosts: Set[str] = set()
+        self.suffixes: Set[str] = set()
+        for entry in entries:
+            entry = entry.strip()
+            if entry == "*":
+                self.any = True
+            elif entry.startswith("*."):
+                self.suffixes.add(entry[1:].lower())
+            elif entry:
+                self.hosts.add(server_host(entry))
+
+    @classmethod
+    def from_env(cls) -> "AllowedServers":
+        """Povolené servery z BAKALARI_ALLOWED_URLS (čárkou oddělený seznam)"""
+        return cls(os.environ.get("BAKALARI_ALLOWED_URLS", "").split(","))
+
+    def allow(self, url: str) -> None:
+        self.hosts.add(server_host(url))
+
+    def allows(self, url: str) -> bool:
+        if self.any:
+            return True
+        host = server_host(url)
+        return host in self.hosts or any(host.endswith(suffix) for suffix in self.suffixes)
+
+    def stats(self) -> Any:
+        return "*" if self.any else sorted(self.hosts) + sorted("*" + suffix for suffix in self.suffixes)
+
+
+class AccountRegistry:
+    """LRU registr klientů indexovaný serverem, uživatelem a otiskem hesla"""
+
+    def __init__(
+        self,
+        max_accounts: int = 200,
+        idle_timeout: float = 30 * 60,
+        cache_max_bytes: int = DEFAULT_ACCOUNT_CACHE_MAX_BYTES,
+        disk_cache: Optional[DiskCache] = None,
+    ):
+        self.max_accounts = max_accounts
+        self.idle_timeout = idle_timeout
+        self.cache_max_bytes = cache_max_bytes
+        self.disk_cache = disk_cache
+        self.cache_enabled = True
+        # Limity zátěže a jističe sdílené účty téže školy
+        self.limiters = ServerLimiters()
+        self.breakers = ServerBreakers()
+        self.allowed = AllowedServers.from_env()
+        self._clients: "OrderedDict[str, BakalariClient]" = OrderedDict()
+        self._sessions: "OrderedDict[str, str]" = OrderedDict()
+        self._logins = SingleFlight()
+        # Účty, které se neuvolňují (výchozí účet z příkazové řádky)
+        self._pinned: Set[str] = set()
+        self.created = 0
+        self.evicted = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls, disk_cache: Optional[DiskCache] = None) -> "AccountRegistry":
+        """Vytvoří registr s limity z BAKALARI_MAX_ACCOUNTS, BAKALARI_ACCOUNT_IDLE_TIMEOUT a BAKALARI_ACCOUNT_CACHE_MAX_BYTES"""
+        return cls(
+            max_accounts=int(os.environ.get("BAKALARI_MAX_ACCOUNTS", "200")),
+            idle_timeout=float(os.environ.get("BAKALARI_ACCOUNT_IDLE_TIMEOUT", str(30 * 60))),
+            cache_max_bytes=int(os.environ.get("BAKALARI_ACCOUNT_CACHE_MAX_BYTES", str(DEFAULT_ACCOUNT_CACHE_MAX_BYTES))),
+            disk_cache=disk_cache,
+        )
+
+    @staticmethod
+    def key(server_url: str, username: str, password: str) -> str:
+        return account_key(server_url, username, password)
+
+    async def get(self, server_url: str, username: str, password: str, pinned: bool = False) -> BakalariClient:
+        """
+        Vrátí klienta pro daný účet, případně ho vytvoří a uvolní nejdéle nepoužité účty.
+        Připnutý účet (pinned) se neuvolňuje ani po nečinnosti. Nepřipnutý účet
+        (z hlaviček požadavku) se do registru vloží až po úspěšném přihlášení,
+        takže pokusy se špatným heslem nevytlačují skutečné účty.
+        """
+        await self.evict_idle()
+        key = self.key(server_url, username, password)
+        if pinned:
+            self._pinned.add(key)
+        client = self._clients.get(key)
+        if client is not None:
+            self._clients.move_to_end(key)
+            return client
+        if pinned:
+            client = self._create(server_url, username, password)
+            await self._add(key, client)
+            return client
+        # Souběžné první požadavky téhož účtu sdílí jedno přihlášení
+        return await self._logins.do(key, lambda: self._login(key, server_url, username, password))
+
+    def _create(self, server_url: str, username: str, password: str) -> BakalariClient:
+        server_url = normalize_url(server_url)
+        client = BakalariClient.from_env(
+            server_url, username, password,
+            disk_cache=self.disk_cache,
+            limiter=self.limiters.for_server(server_url),
+            breaker=self.breakers.for_server(server_url),
+        )
+        client.cache.max_bytes = self.cache_max_bytes
+        if not self.cache_enabled:
+            client.disable_cache()
+        return client
+
+    async def _login(self, key: str, server_url: str, username: str, password: str) -> BakalariClient:
+        client = self._create(server_url, username, password)
+        try:
+            await client.tokens.token()
+        except (BakalariAuthError, BakalariAPIError):
+            self.rejected += 1
+            await client.close()
+            raise
+        await self._add(key, client)
+        return client
+
+    async def _add(self, key: str, client: BakalariClient) -> None:
+        self._clients[key] = client
+        self.created += 1
+        while len(self._clients) > self.max_accounts:
+            # Přednostně se uvolní účty, které právě žádné volání nepoužívá
+            candidates = [k for k in self._clients if k not in self._pinned and k != key]
+            if not candidates:
+                break
+            old_key = next((k for k in candidates if not self._clients[k].users), candidates[0])
+            await self._release(old_key, self._clients.pop(old_key))
+
+    def bind_session(self, session_id: str, client: BakalariClient) -> None:
+        """Přiřadí MCP session k účtu, další požadavky session už nemusí posílat přihlašovací údaje"""
+        for key, candidate in self._clients.items():
+            if candidate is client:
+                self._sessions[session_id] = key
+                self._sessions.move_to_end(session_id)
+                break
+        while len(self._sessions) > self.max_accounts * 4:
+            self._sessions.popitem(last=False)
+
+    def for_session(self, session_id: str) -> Optional[BakalariClient]:
+        """Klient přiřazený k MCP session, pokud ještě nebyl uvolněn"""
+        key = self._sessions.get(session_id)
+        if key is None:
+            return None
+        client = self._clients.get(key)
+        if client is not None:
+            self._clients.move_to_end(key)
+        return client
+
+    async def evict_idle(self) -> None:
+        """Uvolní účty nepoužité déle než idle_timeout"""
+        deadline = time.monotonic() - self.idle_timeout
+        idle = [
+            key for key, client in self._clients.items()
+            if client.last_used < deadline and key not in self._pinned and not client.users
+        ]
+        for key in idle:
+            await self._release(key, self._clients.pop(key))
+
+    async def _release(self, key: str, client: BakalariClient) -> None:
+        self.evicted += 1
+        for session_id in [s for s, k in self._sessions.items() if k == key]:
+            del self._sessions[session_id]
+        await client.retire()
+
+    async def close(self) -> None:
+        """Zavře všechny klienty (při ukončení serveru)"""
+        while self._clients:
+            _, client = self._clients.popitem()
+            await client.close()
+        self._sessions.clear()
+
+    def clients(self) -> List[BakalariClient]:
+        return list(self._clients.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ucty": len(self._clients),
+            "max_uctu": self.max_accounts,
+            "necinnost_limit_s": self.idle_timeout,
+            "sessions": len(self._sessions),
+            "vytvoreno": self.created,
+            "uvolneno": self.evicted,
+            "neuspesna_prihlaseni": self.rejected,
+            "povolene_servery": self.allowed.stats(),
+        }
@@ -0,0 +1,100 @@
+"""
+Jistič (circuit breaker) serveru školy.
+Po několika výpadcích za sebou se jistič rozpojí a další požadavky na server
+hned selžou (nebo se obslouží z cache), místo aby čekaly na časový limit
+a dál zatěžovaly přetížený server. Po reset_timeout sekundách projde jeden
+zkušební požadavek; pokud uspěje, jistič se znovu sepne.
+"""
+
+import os
+import time
+import weakref
+from typing import Optional, Dict, Any
+
+from .errors import BakalariCircuitOpenError
+
+
+class CircuitBreaker:
+    """Jistič jednoho serveru školy sdílený všemi jeho účty"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.opened = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        """Vytvoří jistič s nastavením z BAKALARI_BREAKER_THRESHOLD a BAKALARI_BREAKER_RESET"""
+        return cls(
+            failure_threshold=int(os.environ.get("BAKALARI_BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.environ.get("BAKALARI_BREAKER_RESET", "30")),
+        )
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def check(self) -> None:
+        """
+        Propustí požadavek, nebo vyvolá BakalariCircuitOpenError. Po uplynutí
+        reset_timeout propustí jeden zkušební požadavek a odpočet spustí znovu,
+        takže ostatní požadavky dál selhávají, dokud zkušební neuspěje.
+        """
+        if self.opened_at is None:
+            return
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if remaining <= 0:
+            self.opened_at = time.monotonic()
+            return
+        self.rejected += 1
+        raise BakalariCircuitOpenError(
+            f"Server školy je po opakovaných výpadcích dočasně nedostupný, zkus to znovu za {remaining:.1f} s",
+            retry_after=remaining,
+        )
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.opened += 1
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        remaining = None
+        if self.opened_at is not None:
+            remaining = round(max(self.opened_at + self.reset_timeout - time.monotonic(), 0), 1)
+        return {
+            "stav": "rozpojeny" if self.is_open else "sepnuty",
+            "vypadky_v_rade": self.failures,
+            "prah_vypadku": self.failure_threshold,
+            "zkouska_za_s": remaining,
+            "rozpojeno_krat": self.opened,
+            "odmitnuto": self.rejected,
+        }
+
+
+class ServerBreakers:
+    """
+    Jističe indexované server_url. Jistič žije, dokud ho používá některý
+    klient (slabé reference), stejně jako limity v ratelimit.ServerLimiters.
+    """
+
+    def __init__(self):
+        self._breakers: "weakref.WeakValueDictionary[str, CircuitBreaker]" = weakref.WeakValueDictionary()
+
+    def for_server(self, server_url: str) -> CircuitBreaker:
+        breaker = self._breakers.get(server_url)
+        if breaker is None:
+            breaker = CircuitBreaker.from_env()
+            self._breakers[server_url] = breaker
+        return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        return {url: breaker.stats() for url, breaker in list(self._breakers.items())}
@@ -0,0 +1,230 @@
+"""
+Paměťová TTL cache odpovědí Bakaláři API.
+Klíčem je endpoint včetně query stringu, každá rodina endpointů má vlastní TTL.
+Při překročení limitu velikosti se vyhazují nejdéle nepoužité položky (LRU).
+Prošlou položku lze ještě stale_max_age sekund vrátit hned a obnovit ji na pozadí
+(stale-while-revalidate); taková odpověď nástroje dostane příznak zastaralých dat.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+from . import metrics
+
+
+# Rodiny endpointů: (název, prefix endpointu, výchozí TTL v sekundách)
+# Stálý rozvrh se mění jen párkrát do roka, známky a absence několikrát denně.
+ENDPOINT_FAMILIES: Tuple[Tuple[str, str, float], ...] = (
+    ("staly_rozvrh", "/api/3/timetable/permanent", 24 * 3600),
+    ("rozvrh", "/api/3/timetable/actual", 10 * 60),
+    ("znamky", "/api/3/marks", 5 * 60),
+    ("absence", "/api/3/absence", 5 * 60),
+)
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Jak dlouho po vypršení TTL lze položku ještě vrátit a obnovit na pozadí
+DEFAULT_STALE_MAX_AGE = 30 * 60
+
+# Časy stažení prošlých dat obsloužených během aktuálního volání nástroje
+_stale_served: "ContextVar[Optional[List[float]]]" = ContextVar("stale_served", default=None)
+
+
+@contextmanager
+def track_stale() -> Iterator[List[float]]:
+    """
+    Po dobu bloku zaznamenává časy stažení (fetched_at) prošlých dat, která klient
+    obsloužil. Záznam sdílí i úlohy spuštěné uvnitř bloku (asyncio.gather).
+    """
+    served: List[float] = []
+    token = _stale_served.set(served)
+    try:
+        yield served
+    finally:
+        _stale_served.reset(token)
+
+
+def note_stale(fetched_at: float) -> None:
+    """Zaznamená obsloužení prošlých dat (mimo track_stale se nic neděje)"""
+    served = _stale_served.get()
+    if served is not None:
+        served.append(fetched_at)
+
+
+class CacheEntry:
+    """Jedna položka cache - dekódovaná data a jejich metadata"""
+
+    __slots__ = ("data", "size", "family", "fetched_at", "expires_at")
+
+    def __init__(self, data: Any, size: int, family: str, fetched_at: float, expires_at: float):
+        self.data = data
+        self.size = size
+        self.family = family
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """LRU cache s TTL podle rodiny endpointu a limitem celkové velikosti v bajtech"""
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        enabled: bool = True,
+        stale_max_age: float = DEFAULT_STALE_MAX_AGE,
+    ):
+        self.ttls = {name: ttl for name, _, ttl in ENDPOINT_FAMILIES}
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.stale_max_age = stale_max_age
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """
+        Vytvoří cache s nastavením z proměnných prostředí.
+        BAKALARI_CACHE=0 cache vypne, BAKALARI_CACHE_MAX_BYTES nastaví limit velikosti
+        a BAKALARI_CACHE_TTL_<RODINA> (např. BAKALARI_CACHE_TTL_ZNAMKY) přepíše TTL.
+        BAKALARI_CACHE_STALE_MAX_AGE omezuje stáří prošlých dat (0 vypne stale-while-revalidate).
+        """
+        ttls = {}
+        for name, _, _ in ENDPOINT_FAMILIES:
+            value = os.environ.get(f"BAKALARI_CACHE_TTL_{name.upper()}")
+            if value is not None:
+                ttls[name] = float(value)
+        return cls(
+            ttls=ttls,
+            max_bytes=int(os.environ.get("BAKALARI_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES))),
+            enabled=os.environ.get("BAKALARI_CACHE", "1") not in ("0", "false", "no"),
+            stale_max_age=float(os.environ.get("BAKALARI_CACHE_STALE_MAX_AGE", str(DEFAULT_STALE_MAX_AGE))),
+        )
+
+    @staticmethod
+    def family(endpoint: str) -> Optional[str]:
+        """Vrátí název rodiny endpointu, nebo None pokud se endpoint necachuje"""
+        for name, prefix, _ in ENDPOINT_FAMILIES:
+            if endpoint.startswith(prefix):
+                return name
+        return None
+
+    def _count(self, family: str, counter: str) -> None:
+        counters = self._counters.setdefault(
+            family, {"hits": 0, "misses": 0, "expired": 0, "stale": 0, "evictions": 0, "refreshes": 0}
+        )
+        counters[counter] += 1
+        metrics.cache_events.inc(family, counter)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Vrátí data z cache, pokud existují a nevypršela"""
+        family = self.family(key)
+        if not self.enabled or family is None:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self._count(family, "misses")
+            return None
+        if entry.expires_at <= time.monotonic():
+            # Prošlá položka zůstává (do vytlačení LRU) pro případ výpadku serveru, viz peek()
+            self._count(family, "expired")
+            self._count(family, "misses")
+            return None
+        self._entries.move_to_end(key)
+        self._count(family, "hits")
+        return entry.data
+
+    def get_stale(self, key: str) -> Optional[CacheEntry]:
+        """
+        Vrátí prošlou položku, pokud od vypršení TTL neuplynulo víc než stale_max_age
+        (stale-while-revalidate). Volá se až poté, co get() čerstvá data nenašel.
+        """
+        family = self.family(key)
+        if not self.enabled or family is None or self.stale_max_age <= 0:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry.expires_at > self.stale_max_age:
+            return None
+        self._entries.move_to_end(key)
+        self._count(family, "stale")
+        return entry
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Vrátí položku i po vypršení TTL - pro obsloužení požadavku, když server neodpovídá"""
+        if not self.enabled:
+            return None
+        return self._entries.get(key)
+
+    def note_refresh(self, key: str) -> None:
+        """Zaznamená vynucené obnovení (obejití cache) pro daný endpoint"""
+        family = self.family(key)
+        if self.enabled and family is not None:
+            self._count(family, "refreshes")
+
+    def ttl_for(self, key: str) -> float:
+        """TTL pro daný endpoint (0 pokud se necachuje)"""
+        family = self.family(key)
+        return self.ttls.get(family, 0) if family else 0
+
+    def put(self, key: str, data: Any, size: int, fetched_at: Optional[float] = None) -> None:
+        """
+        Uloží data do cache; size je velikost odpovědi v bajtech.
+        U dat načtených z disku se zbývající TTL počítá od původního času stažení fetched_at;
+        již prošlá data se uloží, pokud jsou ještě v limitu stale_max_age.
+        """
+        family = self.family(key)
+        if not self.enabled or family is None:
+            return
+        ttl = self.ttls.get(family, 0)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        if fetched_at is not None:
+            ttl -= time.time() - fetched_at
+        else:
+            fetched_at = time.time()
+        if ttl <= -self.stale_max_age:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = CacheEntry(data, size, family, fetched_at, time.monotonic() + ttl)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            oldest_key, oldest = next(iter(self._entries.items()))
+            self._remove(oldest_key)
+            self._count(oldest.family, "evictions")
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def invalidate(self, prefix: str = "") -> int:
+        """Odstraní všechny položky, jejichž klíč začíná daným prefixem"""
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Počítadla zásahů a výpadků podle rodin endpointů a využití kapacity"""
+        hits = sum(c["hits"] for c in self._counters.values())
+        misses = sum(c["misses"] for c in self._counters.values())
+        return {
+            "zapnuta": self.enabled,
+            "polozky": len(self._entries),
+            "velikost_bajtu": self._bytes,
+            "limit_bajtu": self.max_bytes,
+            "ttl_s": dict(self.ttls),
+            "max_zastarani_s": self.stale_max_age,
+            "zasahy": hits,
+            "vypadky": misses,
+            "uspesnost": round(hits / (hits + misses), 4) if hits + misses else None,
+            "rodiny": {family: dict(counters) for family, counters in self._counters.items()},
+        }
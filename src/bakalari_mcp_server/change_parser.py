@@ -0,0 +1,69 @@
+"""
+Parser popisů změn v aktuálním rozvrhu (suplování, zrušení, spojení hodin).
+Stejné popisy se opakují napříč týdny i studenty, výsledky se proto drží
+v omezené LRU paměti klíčované textem popisu. Vzory jsou předkompilované.
+"""
+
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+
+# Příklady:
+# "Spojeno: IT, Breginová Ivana, MMU (Aj, Lipinová Ivana, M2)"
+# "Suplování: Hennhofer Dennis (Tru)"
+# "Zrušeno (PCV, Czernek Pavel)"
+SPOJENO_RE = re.compile(r'Spojeno:\s*([^,]+),\s*([^,]+),\s*([^(]+)')
+SUPLOVANI_RE = re.compile(r'Suplování:\s*([^(]+)\s*\(([^)]+)\)')
+ZRUSENO_RE = re.compile(r'Zrušeno\s*\(([^,]+),\s*([^)]+)\)')
+
+# Maximální počet zapamatovaných popisů
+MEMO_SIZE = 4096
+
+_EMPTY: Mapping[str, str] = MappingProxyType({})
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def parse_change_description(description: Optional[str]) -> Mapping[str, str]:
+    """
+    Parsuje popis změny a extrahuje z něj předmět, učitele, místnost a původního učitele.
+    Výsledek je sdílený mezi voláními (LRU paměť), proto je jen pro čtení.
+    """
+    if not description:
+        return _EMPTY
+
+    match = SPOJENO_RE.search(description)
+    if match:
+        return MappingProxyType({
+            "predmet": match.group(1).strip(),
+            "ucitel": match.group(2).strip(),
+            "mistnost": match.group(3).strip(),
+        })
+
+    match = SUPLOVANI_RE.search(description)
+    if match:
+        return MappingProxyType({
+            "ucitel": match.group(1).strip(),
+            "puvodni_ucitel": match.group(2).strip(),
+        })
+
+    match = ZRUSENO_RE.search(description)
+    if match:
+        return MappingProxyType({
+            "predmet": match.group(1).strip(),
+            "ucitel": match.group(2).strip(),
+        })
+
+    return _EMPTY
+
+
+def stats() -> Dict[str, Any]:
+    """Statistiky LRU paměti parseru"""
+    info = parse_change_description.cache_info()
+    return {
+        "zasahy": info.hits,
+        "vypadky": info.misses,
+        "polozky": info.currsize,
+        "max_polozek": info.maxsize,
+    }
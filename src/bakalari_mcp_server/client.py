@@ -0,0 +1,442 @@
+"""
+Klient Bakaláři v3 API pro jeden účet.
+Sdružuje vše, co patří k jednomu přihlášení: tokeny, HTTP pool, cache odpovědí
+a slučování souběžných požadavků. Limit zátěže a jistič patří serveru školy
+a sdílí je všechny jeho účty. Server jich může držet více (viz accounts.py).
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import sys
+import time
+from typing import Optional, Dict, Any, Tuple
+from urllib import parse
+
+import aiohttp
+
+from .breaker import CircuitBreaker
+from .cache import ResponseCache, note_stale
+from .disk_cache import DiskCache, StoredResponse
+from .errors import BakalariAuthError, BakalariAPIError, BakalariUnavailableError
+from .http_pool import HttpPool
+from . import json_backend, metrics, tracing
+from .marks import MarksSnapshot
+from .models import MODEL_PARSERS, model_size
+from .ratelimit import UpstreamLimiter
+from .retry import RETRY_STATUSES, RetryPolicy, parse_retry_after
+from .singleflight import SingleFlight
+from .timetable import WeekCache
+from .tokens import TokenManager
+
+
+def normalize_url(url: str) -> str:
+    """Přidá https:// prefix pokud chybí a odstraní koncové lomítko"""
+    url = url.rstrip('/')
+    if not url.startswith(('http://', 'https://')):
+        url = f"https://{url}"
+    return url
+
+
+def account_key(server_url: str, username: Optional[str], password: Optional[str]) -> str:
+    """
+    Klíč účtu v registru a v perzistentní cache. Heslo je jeho součástí, aby jiné
+    heslo ke stejnému jménu nedostalo cizího přihlášeného klienta ani jeho data.
+    """
+    raw = "\0".join((normalize_url(server_url), username or "", password or ""))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# Nejdelší část těla chybové odpovědi, která se vrací v textu chyby
+MAX_ERROR_BODY = 200
+
+
+class BakalariClient:
+    """Autentizovaný přístup k API jednoho uživatele s vlastním poolem a cache"""
+
+    def __init__(
+        self,
+        server_url: str,
+        username: Optional[str],
+        password: Optional[str],
+        pool: HttpPool,
+        cache: ResponseCache,
+        tokens: TokenManager,
+        disk_cache: Optional[DiskCache] = None,
+        limiter: Optional[UpstreamLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        retry: Optional[RetryPolicy] = None,
+    ):
+        self.server_url = server_url
+        self.username = username
+        self.key = account_key(server_url, username, password)
+        self.pool = pool
+        self.cache = cache
+        self.tokens = tokens
+        self.disk_cache = disk_cache
+        # Limit zátěže serveru školy (sdílený účty téže školy, viz ratelimit.py)
+        self.limiter = limiter if limiter is not None else UpstreamLimiter.from_env(server_url)
+        self.breaker = breaker if breaker is not None else CircuitBreaker.from_env()
+        # Přihlášení prochází stejným limitem a jističem jako ostatní požadavky
+        self.tokens.configure(server_url, username, password, self.limiter, self.breaker)
+        self.retry = retry if retry is not None else RetryPolicy.from_env()
+        # Dekódované týdny aktuálního rozvrhu žijí stejně dlouho jako jejich odpovědi v cache
+        self.weeks = WeekCache(enabled=cache.enabled)
+        # Stav známek pro nástroj nove_znamky (změny od posledního volání)
+        self.marks = MarksSnapshot()
+        self.inflight = SingleFlight()
+        self._revalidating: Dict[str, asyncio.Future] = {}
+        self.stale_served = 0
+        self.last_used = time.monotonic()
+        # Počet probíhajících volání nástrojů, která klienta používají (viz retire)
+        self.users = 0
+        self.retired = False
+
+    @classmethod
+    def from_env(
+        cls,
+        server_url: str,
+        username: Optional[str],
+        password: Optional[str],
+        disk_cache: Optional[DiskCache] = None,
+        limiter: Optional[UpstreamLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> "BakalariClient":
+        """Vytvoří klienta s poolem, cache a správou tokenů nastavenými z proměnných prostředí"""
+        pool = HttpPool.from_env()
+        return cls(
+            normalize_url(server_url),
+            username,
+            password,
+            pool=pool,
+            cache=ResponseCache.from_env(),
+            tokens=TokenManager.from_env(pool),
+            disk_cache=disk_cache,
+            limiter=limiter,
+            breaker=breaker,
+        )
+
+    @property
+    def account(self) -> str:
+        """Identifikace účtu pro statistiky a výpisy"""
+        return f"{self.username}@{parse.urlsplit(self.server_url).netloc}"
+
+    def _disk_key(self, endpoint: str) -> str:
+        # Perzistentní cache je sdílená všemi účty procesu, klíč proto obsahuje
+        # klíč účtu včetně otisku hesla (stejně jako registr účtů)
+        return f"{self.key}|{endpoint}"
+
+    async def authenticate(self) -> None:
+        """
+        Ověří přihlašovací údaje u serveru, pokud je v tomto procesu ještě nepřijal.
+        Data z perzistentní a prošlé cache se vydají až po ověření, jinak by je
+        dostal kdokoli se jménem uživatele.
+        """
+        if not self.tokens.verified:
+            await self.tokens.token()
+
+    async def start(self) -> None:
+        """Otevře pool a přihlásí se předem, aby první volání nástroje nečekalo na login"""
+        await self.pool.session()
+        try:
+            await self.tokens.token()
+        except (BakalariAuthError, BakalariAPIError) as e:
+            print(f"Úvodní přihlášení ({self.account}) selhalo: {e}", file=sys.stderr)
+
+    def acquire(self) -> None:
+        """Označí klienta jako používaného voláním nástroje (do release)"""
+        self.users += 1
+
+    async def release(self) -> None:
+        """Konec použití voláním nástroje; vyřazený klient se zavře s posledním uživatelem"""
+        self.users -= 1
+        if self.retired and self.users == 0:
+            await self.close()
+
+    async def retire(self) -> None:
+        """
+        Vyřadí klienta z registru. Pokud ho ještě používá probíhající volání,
+        zavře se až po jeho skončení - jinak by volání pokračovalo nad zavřeným
+        poolem a HttpPool.session() by otevřel novou session, kterou už nikdo nezavře.
+        """
+        self.retired = True
+        if self.users == 0:
+            await self.close()
+
+    async def close(self) -> None:
+        """Zruší úlohy na pozadí a zavře HTTP pool"""
+        for task in list(self._revalidating.values()):
+            task.cancel()
+        await self.tokens.close()
+        await self.pool.close()
+
+    async def fetch(self, endpoint: str, method: str = "GET", extra_headers: Optional[Dict[str, str]] = None, **kwargs) -> Tuple[int, bytes, Dict[str, str]]:
+        """
+        Provede HTTP požadavek s automatickou autentizací.
+        Vrací stavový kód, tělo a hlavičky odpovědi.
+        """
+        used_token = await self.tokens.token()
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Authorization": f"Bearer {used_token}"
+        }
+        if extra_headers:
+            headers.update(extra_headers)
+
+        session = await self.pool.session()
+        try:
+            status, body, response_headers = await self._send(session, method, endpoint, headers, **kwargs)
+            if status != 401:
+                return status, body, response_headers
+            # Token expiroval dřív, než jsme čekali - obnovíme ho (pokud
+            # ho mezitím neobnovil jiný souběžný požadavek) a zopakujeme
+            new_token = await self.tokens.refresh(stale_token=used_token)
+            headers["Authorization"] = f"Bearer {new_token}"
+            return await self._send(session, method, endpoint, headers, **kwargs)
+        except asyncio.TimeoutError:
+            raise BakalariUnavailableError("Vypršel časový limit požadavku")
+        except aiohttp.ClientError as e:
+            raise BakalariUnavailableError(f"Chyba připojení: {e}")
+
+    async def _send(self, session: aiohttp.ClientSession, method: str, endpoint: str, headers: Dict[str, str], **kwargs) -> Tuple[int, bytes, Dict[str, str]]:
+        """
+        Jeden HTTP požadavek v limitu zátěže serveru školy; jeho doba se zaznamená
+        do metrik, čekání ve frontě limitu do spanu (queue_ms).
+        """
+        path = parse.urlsplit(endpoint).path
+        with tracing.span("upstream", endpoint=path, method=method) as span:
+            queued = time.perf_counter()
+            async with self.limiter.slot():
+                start = time.perf_counter()
+                status = "chyba_spojeni"
+                try:
+                    async with session.request(method, f"{self.server_url}{endpoint}", headers=headers, **kwargs) as response:
+                        status = str(response.status)
+                        body = await response.read()
+                        span.set(bytes=len(body))
+                        return response.status, body, dict(response.headers)
+                except asyncio.TimeoutError:
+                    status = "timeout"
+                    raise
+                finally:
+                    metrics.upstream_duration.observe(time.perf_counter() - start, path, status)
+                    span.set(status=status, queue_ms=round((start - queued) * 1000, 3))
+
+    async def fetch_with_retry(self, endpoint: str, method: str = "GET", extra_headers: Optional[Dict[str, str]] = None, **kwargs) -> Tuple[int, bytes, Dict[str, str]]:
+        """
+        Provede požadavek přes jistič serveru školy. Idempotentní požadavky se při
+        chybě spojení, vypršení časového limitu nebo odpovědi 429/5xx opakují
+        s exponenciálním čekáním s náhodným rozptylem (viz retry.py).
+        """
+        attempts = self.retry.attempts_for(method)
+        for attempt in range(1, attempts + 1):
+            self.breaker.check()
+            try:
+                status, body, headers = await self.fetch(endpoint, method, extra_headers, **kwargs)
+            except BakalariUnavailableError:
+                self.breaker.record_failure()
+                if attempt == attempts:
+                    raise
+                retry_after = None
+            else:
+                if status not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    return status, body, headers
+                self.breaker.record_failure()
+                if attempt == attempts:
+                    return status, body, headers
+                retry_after = parse_retry_after(headers.get("Retry-After"))
+            await asyncio.sleep(self.retry.delay(attempt, retry_after))
+
+    def decode(self, cache_key: Optional[str], body: bytes) -> Any:
+        """
+        Dekóduje JSON odpověď. Odpovědi známých rodin endpointů převede do modelu
+        (viz models.py), ostatní vrací jako slovník.
+        """
+        with tracing.span("decode", endpoint=cache_key or "", bytes=len(body)) as span:
+            start = time.perf_counter()
+            data = json_backend.loads(body)
+            parser = MODEL_PARSERS.get(self.cache.family(cache_key)) if cache_key else None
+            if parser is None:
+                return data
+            if span.recording:
+                span.set(json_ms=round((time.perf_counter() - start) * 1000, 3))
+            model = parser(data)
+            if span.recording:
+                span.set(**model_size(model))
+            return model
+
+    async def store_payload(self, cache_key: Optional[str], body: bytes, headers: Dict[str, str]) -> Any:
+        """
+        Dekóduje odpověď a uloží ji do paměťové i perzistentní cache.
+        """
+        data = self.decode(cache_key, body)
+        if cache_key:
+            self.cache.put(cache_key, data, len(body))
+            if self.disk_cache is not None:
+                try:
+                    await self.disk_cache.put(self._disk_key(cache_key), body, headers.get("ETag"), headers.get("Last-Modified"))
+                except sqlite3.Error as e:
+                    print(f"Chyba zápisu do perzistentní cache: {e}", file=sys.stderr)
+        return data
+
+    async def revalidate(self, endpoint: str, stored: StoredResponse) -> None:
+        """
+        Na pozadí ověří odpověď načtenou z disku podmíněným GET požadavkem.
+        """
+        try:
+            status, body, headers = await self.fetch_with_retry(endpoint, extra_headers=stored.conditional_headers())
+            if status == 304:
+                await self.disk_cache.touch(stored.key)
+                self.cache.put(endpoint, self.decode(endpoint, stored.body), len(stored.body))
+            elif status == 200:
+                await self.store_payload(endpoint, body, headers)
+        except Exception as e:
+            print(f"Revalidace {endpoint} ({self.account}) selhala: {e}", file=sys.stderr)
+        finally:
+            self._revalidating.pop(endpoint, None)
+
+    async def load_from_disk(self, cache_key: str) -> Any:
+        """
+        Zkusí obsloužit požadavek z perzistentní cache.
+        Pokud je uložená odpověď starší než TTL, vrátí ji a spustí revalidaci na pozadí;
+        odpověď prošlou o víc než stale_max_age nevrací (požadavek počká na server).
+        """
+        await self.authenticate()
+        try:
+            stored = await self.disk_cache.get(self._disk_key(cache_key))
+        except sqlite3.Error as e:
+            print(f"Chyba čtení z perzistentní cache: {e}", file=sys.stderr)
+            return None
+        if stored is None:
+            return None
+        ttl = self.cache.ttl_for(cache_key)
+        if stored.age >= ttl + self.cache.stale_max_age:
+            return None
+        data = self.decode(cache_key, stored.body)
+        self.cache.put(cache_key, data, len(stored.body), fetched_at=stored.fetched_at)
+        if stored.age >= ttl:
+            note_stale(stored.fetched_at)
+            if cache_key not in self._revalidating:
+                self._revalidating[cache_key] = asyncio.ensure_future(self.revalidate(cache_key, stored))
+        return data
+
+    def refresh_in_background(self, cache_key: str) -> None:
+        """Spustí obnovení prošlé odpovědi na pozadí (nejvýše jedno na endpoint)"""
+        if cache_key not in self._revalidating:
+            self._revalidating[cache_key] = asyncio.ensure_future(self._refresh(cache_key))
+
+    async def _refresh(self, cache_key: str) -> None:
+        try:
+            await self.inflight.do(self._flight_key("GET", cache_key, {}), lambda: self._request_and_store(cache_key, "GET", cache_key))
+        except Exception as e:
+            print(f"Obnovení {cache_key} ({self.account}) na pozadí selhalo: {e}", file=sys.stderr)
+        finally:
+            self._revalidating.pop(cache_key, None)
+
+    @staticmethod
+    def _flight_key(method: str, endpoint: str, kwargs: Dict[str, Any]) -> Tuple[str, str, str, str]:
+        # Souběžné identické požadavky (metoda + URL + tělo) sdílí jedno volání API
+        return (method, endpoint, repr(kwargs.get("data")), repr(kwargs.get("json")))
+
+    async def request(self, endpoint: str, method: str = "GET", refresh: bool = False, **kwargs) -> Any:
+        """
+        Provede API požadavek s automatickou autentizací.
+        GET požadavky se obsluhují z cache (paměťové, pak perzistentní),
+        pokud není vynuceno obnovení (refresh). Prošlá odpověď se v limitu
+        stale_max_age vrátí hned a obnoví na pozadí. Odpovědi rozvrhu, známek
+        a absencí se vrací jako model (viz models.py).
+        """
+        self.last_used = time.monotonic()
+        with tracing.span("request", endpoint=endpoint, method=method) as span:
+            return await self._request(span, endpoint, method, refresh, **kwargs)
+
+    async def _request(self, span: Any, endpoint: str, method: str, refresh: bool, **kwargs) -> Any:
+        # Cachujeme pouze GET požadavky, klíčem je endpoint včetně query stringu
+        cache_key = endpoint if method == "GET" and self.cache.family(endpoint) else None
+        if cache_key:
+            if refresh:
+                self.cache.note_refresh(cache_key)
+                span.set(cache="refresh")
+            else:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    span.set(cache="hit")
+                    return cached
+                entry = self.cache.get_stale(cache_key)
+                if entry is not None:
+                    self.refresh_in_background(cache_key)
+                    note_stale(entry.fetched_at)
+                    span.set(cache="stale")
+                    return entry.data
+                if self.disk_cache is not None:
+                    stored = await self.load_from_disk(cache_key)
+                    if stored is not None:
+                        span.set(cache="disk")
+                        return stored
+                span.set(cache="miss")
+
+        try:
+            return await self.inflight.do(self._flight_key(method, endpoint, kwargs), lambda: self._request_and_store(endpoint, method, cache_key, **kwargs))
+        except BakalariUnavailableError as e:
+            # Server neodpovídá (nebo je rozpojený jistič) - raději starší data než žádná
+            stale = await self.load_stale(cache_key) if cache_key else None
+            if stale is None:
+                raise
+            print(f"{endpoint} ({self.account}) obslouženo z prošlé cache: {e}", file=sys.stderr)
+            span.set(cache="stale_fallback", error=str(e))
+            return stale
+
+    async def load_stale(self, cache_key: str) -> Any:
+        """
+        Poslední známá odpověď bez ohledu na TTL (paměťová, pak perzistentní cache).
+        Pokud účet nelze ověřit (server neodpovídá ani na přihlášení), vrací None.
+        """
+        try:
+            await self.authenticate()
+        except (BakalariAuthError, BakalariAPIError):
+            return None
+        entry = self.cache.peek(cache_key)
+        if entry is not None:
+            self.stale_served += 1
+            note_stale(entry.fetched_at)
+            return entry.data
+        if self.disk_cache is None:
+            return None
+        try:
+            stored = await self.disk_cache.get(self._disk_key(cache_key))
+        except sqlite3.Error as e:
+            print(f"Chyba čtení z perzistentní cache: {e}", file=sys.stderr)
+            return None
+        if stored is None:
+            return None
+        self.stale_served += 1
+        note_stale(stored.fetched_at)
+        return self.decode(cache_key, stored.body)
+
+    async def _request_and_store(self, endpoint: str, method: str, cache_key: Optional[str], **kwargs) -> Any:
+        status, body, headers = await self.fetch_with_retry(endpoint, method, **kwargs)
+        if status != 200:
+            error = BakalariUnavailableError if status in RETRY_STATUSES else BakalariAPIError
+            raise error(f"API chyba {status}: {body[:MAX_ERROR_BODY].decode('utf-8', errors='replace')}")
+        return await self.store_payload(cache_key, body, headers)
+
+    def disable_cache(self) -> None:
+        """Vypne cache odpovědí i dekódovaných týdnů (parametr --no-cache)"""
+        self.cache.enabled = False
+        self.weeks.enabled = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiky poolu, cache, slučování požadavků a tokenu tohoto účtu"""
+        return {
+            "ucet": self.account,
+            "pool": self.pool.stats(),
+            "cache": self.cache.stats(),
+            "tydny_rozvrhu": self.weeks.stats(),
+            "slucovani_pozadavku": self.inflight.stats(),
+            "token": self.tokens.stats(),
+            "limit_serveru": self.limiter.stats(),
+            "jistic": self.breaker.stats(),
+            "opakovani": self.retry.stats(),
+            "obslouzeno_z_prosle_cache": self.stale_served,
+        }
@@ -0,0 +1,1111 @@
+#!/usr/bin/env python3
+"""
+Jádro Bakaláři v3 API MCP Serveru.
+Obsahuje klienty účtů, dekódování odpovědí a všechny nástroje. Transporty
+(stdio v server.py, HTTP streaming a SSE v server_http.py) nad ním jen
+zpracují parametry příkazové řádky a spustí server.
+"""
+
+import argparse
+import asyncio
+import functools
+import hmac
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, Any, List, Awaitable, Callable
+
+from fastmcp import Context, FastMCP
+from fastmcp.server.dependencies import get_context, get_http_headers
+from fastmcp.tools import ToolResult
+from mcp.types import TextContent
+
+from . import change_parser, json_backend, metrics, profiling, tracing
+from .accounts import AccountRegistry
+from .cache import track_stale
+from .change_parser import parse_change_description
+from .client import BakalariClient, normalize_url
+from .diagnostics import Diagnostics, permanent_timetable_info, teachers_info
+from .disk_cache import DiskCache
+from .errors import BakalariAuthError, BakalariAPIError, BakalariRetryLaterError
+from .marks import MARK_FIELDS, format_mark, parse_cursor, parse_fields
+from .models import AbsenceReport, Atom, GradeBook, Timetable, TimetableDay
+from .timetable import DecodedWeek, week_start
+
+# Registr klientů pro jednotlivé účty (každý má vlastní tokeny, pool a cache)
+registry = AccountRegistry.from_env()
+
+# Volitelná perzistentní cache na disku (zapíná se přes --disk-cache / BAKALARI_DISK_CACHE)
+disk_cache: Optional[DiskCache] = None
+
+# Diagnostický režim - ladicí informace v odpovědích (--diagnostics / BAKALARI_DIAGNOSTICS)
+diagnostics = Diagnostics.from_env()
+
+# Výchozí účet z příkazové řádky pro požadavky bez vlastních přihlašovacích údajů
+default_url: Optional[str] = None
+default_user: Optional[str] = None
+default_password: Optional[str] = None
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Otevře sdílené prostředky při startu serveru a uvolní je při ukončení"""
+    if disk_cache is not None:
+        # Při startu odstraníme prošlé záznamy z předchozích běhů
+        await disk_cache.compact()
+    if default_user and default_password:
+        default_client = await registry.get(default_url, default_user, default_password, pinned=True)
+        await default_client.start()
+    try:
+        yield {}
+    finally:
+        await registry.close()
+        await tracing.close()
+        if disk_cache is not None:
+            disk_cache.close()
+
+# Vytvoření MCP serveru (transport se volí až při spuštění)
+mcp = FastMCP("Bakaláři v3 API", lifespan=lifespan)
+
+
+def current_context() -> Optional[Context]:
+    """Kontext právě probíhajícího MCP požadavku (None při přímém volání nástroje)"""
+    try:
+        return get_context()
+    except RuntimeError:
+        return None
+
+
+# Názvy registrovaných nástrojů (pro nástroj profilovani)
+TOOL_NAMES: List[str] = []
+
+# Klienti účtů použití probíhajícím voláním nástroje; registr je do konce volání nezavře
+_call_clients: "ContextVar[Optional[List[BakalariClient]]]" = ContextVar("call_clients", default=None)
+
+
+def tool(fn: Callable[..., Awaitable[Dict[str, Any]]]) -> Callable[..., Awaitable[Dict[str, Any]]]:
+    """
+    Registruje nástroj v MCP serveru. Textový výsledek serializuje JSON backendem
+    (orjson/msgspec, viz json_backend.py). Pokud nástroj použil prošlá data z cache,
+    výsledek dostane příznak zastarala_data a čas stažení nejstarších dat (stazeno).
+    Počet, výsledek a dobu volání zaznamenává do metrik (viz metrics.py), při
+    zapnutém trasování je volání kořenovým spanem fází (viz tracing.py) a naplánovaná
+    volání běží pod profilerem (viz profiling.py).
+    Funkce sama zůstává přímo volatelná a vrací slovník.
+    """
+    name = fn.__name__
+    TOOL_NAMES.append(name)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = "vyjimka"
+        metrics.tools_in_flight.inc(name)
+        clients_token = _call_clients.set([])
+        try:
+            with tracing.span(f"tool {name}", tool=name) as root:
+                with track_stale() as stale, profiling.profiler.profile(name):
+                    result = await fn(*args, **kwargs)
+                outcome = "chyba" if "error" in result else "ok"
+                if outcome == "chyba":
+                    root.set(error=str(result["error"]))
+                if stale:
+                    result["zastarala_data"] = True
+                    result["stazeno"] = datetime.fromtimestamp(min(stale)).isoformat(timespec="seconds")
+                    root.set(stale=True)
+                with tracing.span("serialize") as span:
+                    text = json_backend.dumps(result)
+                    span.set(bytes=len(text))
+                return ToolResult(
+                    content=[TextContent(type="text", text=text)],
+                    structured_content=result
+                )
+        finally:
+            for account_client in _call_clients.get():
+                await account_client.release()
+            _call_clients.reset(clients_token)
+            metrics.tools_in_flight.dec(name)
+            metrics.tool_calls.inc(name, outcome)
+            metrics.tool_duration.observe(time.perf_counter() - start, name)
+    
+    mcp.tool()(wrapper)
+    return fn
+
+
+# Nejdelší povolený rozsah pro nástroj rozvrh_rozsah (ve dnech)
+MAX_RANGE_DAYS = 62
+
+
+async def get_client() -> BakalariClient:
+    """
+    Najde klienta pro aktuální požadavek. Přihlašovací údaje se berou z hlaviček
+    X-Bakalari-User, X-Bakalari-Password a X-Bakalari-Url; MCP session si účet
+    pamatuje, takže je stačí poslat jednou. Jinak se použije výchozí účet z příkazové řádky.
+    Během volání nástroje je klient do jeho konce označen jako používaný.
+    """
+    account_client = await _find_client()
+    held = _call_clients.get()
+    if held is not None and account_client not in held:
+        account_client.acquire()
+        held.append(account_client)
+    return account_client
+
+
+async def _find_client() -> BakalariClient:
+    headers = get_http_headers(include_all=True)
+    user = headers.get("x-bakalari-user")
+    pwd = headers.get("x-bakalari-password")
+    session_id = headers.get("mcp-session-id")
+    
+    if user and pwd:
+        url = headers.get("x-bakalari-url") or default_url
+        if not url:
+            raise BakalariAuthError("Chybí URL Bakaláři serveru (hlavička X-Bakalari-Url)")
+        if not registry.allowed.allows(url):
+            raise BakalariAuthError(f"Server {url} není povolen (BAKALARI_ALLOWED_URLS)")
+        account_client = await registry.get(url, user, pwd)
+        if session_id:
+            registry.bind_session(session_id, account_client)
+        return account_client
+    
+    if session_id:
+        account_client = registry.for_session(session_id)
+        if account_client is not None:
+            return account_client
+    
+    if default_url and default_user and default_password:
+        return await registry.get(default_url, default_user, default_password, pinned=True)
+    
+    raise BakalariAuthError("Nejsou k dispozici přihlašovací údaje (hlavičky X-Bakalari-User a X-Bakalari-Password)")
+
+
+async def api_request(endpoint: str, method: str = "GET", refresh: bool = False, **kwargs) -> Dict[str, Any]:
+    """
+    Provede API požadavek za účet aktuálního požadavku s automatickou autentizací
+    (a cache pro GET požadavky).
+    """
+    account_client = await get_client()
+    return await account_client.request(endpoint, method, refresh=refresh, **kwargs)
+
+
+def retry_later(error: BakalariRetryLaterError) -> Dict[str, Any]:
+    """
+    Odpověď nástroje, když požadavek nebyl odeslán (limit zátěže serveru školy,
+    rozpojený jistič). Kromě textu chyby obsahuje příznak důvodu (pretizeno,
+    server_nedostupny) a dobu, po které má smysl volání opakovat.
+    """
+    return {
+        "error": f"Chyba API: {error}",
+        error.flag: True,
+        "opakovat_za_s": round(error.retry_after, 1)
+    }
+
+
+def lesson_order(atom: Atom) -> int:
+    """Pořadí hodiny v rámci dne podle jejího čísla (hodiny bez čísla na konec)"""
+    caption = atom.hour.caption if atom.hour else str(atom.hour_id)
+    return int(caption) if caption.isdigit() else 999
+
+
+def render_actual_lesson(atom: Atom) -> Dict[str, Any]:
+    """
+    Převede hodinu aktuálního rozvrhu z modelu do výstupního formátu nástrojů.
+    """
+    hour = atom.hour
+    subject = atom.subject
+    teacher = atom.teacher
+    
+    # Používáme konzistentně plné jméno učitele, pokud není k dispozici, použijeme zkratku
+    teacher_name = teacher.name if teacher else ""
+    teacher_abbrev = teacher.abbrev if teacher else ""
+    
+    hodina = {
+        "hodina": hour.caption if hour else str(atom.hour_id),
+        "cas": f"{hour.begin} - {hour.end or ''}" if hour and hour.begin else None,
+        "predmet": subject.name if subject else "",
+        "zkratka_predmetu": subject.abbrev if subject else "",
+        "ucitel": teacher_name if teacher_name else teacher_abbrev,
+        "ucitel_zkratka": teacher_abbrev,
+        "mistnost": atom.room.abbrev if atom.room else "",
+        "tema": atom.theme
+    }
+    
+    change = atom.change
+    if change is not None:
+        parsed = parse_change_description(change.description)
+        
+        # Zpracování zrušených hodin
+        if change.type == "Canceled":
+            hodina["zruseno"] = True
+            hodina["predmet"] = "ZRUŠENO"
+            hodina["zkratka_predmetu"] = "❌"
+            # Pro zrušené hodiny zkusíme extrahovat původní předmět z popisu
+            if parsed.get("predmet"):
+                hodina["puvodni_predmet"] = parsed["predmet"]
+            if parsed.get("ucitel"):
+                hodina["puvodni_ucitel"] = parsed["ucitel"]
+        elif parsed.get("puvodni_ucitel"):
+            # Suplování - popis uvádí původního učitele v závorce
+            hodina["puvodni_ucitel"] = parsed["puvodni_ucitel"]
+        
+        # Pokud je změna, přidáme informaci o změně (NEPŘEPISUJEME učitele z API)
+        hodina["zmena"] = {
+            "typ": change.type,
+            "popis": change.description
+        }
+    
+    return hodina
+
+
+def decode_actual_week(timetable: Timetable) -> DecodedWeek:
+    """
+    Dekóduje celý týden aktuálního rozvrhu - hodiny se seřadí jednou a den se pak jen vyhledá.
+    """
+    week = DecodedWeek(teachers=timetable.teachers)
+    for day in timetable.days:
+        if not day.date:
+            continue
+        day_of_week = day.day_of_week or date.fromisoformat(day.date).weekday() + 1
+        week.add_day(day.date, day_of_week, tuple(sorted(day.atoms, key=lesson_order)))
+    return week
+
+
+async def get_week(monday: date, refresh: bool = False, account_client: Optional[BakalariClient] = None) -> DecodedWeek:
+    """
+    Vrátí dekódovaný týden aktuálního rozvrhu. Odpověď se bere z cache odpovědí
+    a dekóduje se jen jednou, dokud cache vrací stejný model. Bez zadaného
+    klienta se použije účet aktuálního požadavku.
+    """
+    if account_client is None:
+        account_client = await get_client()
+    timetable = await account_client.request(f"/api/3/timetable/actual?date={monday.isoformat()}", refresh=refresh)
+    week = account_client.weeks.get(monday, timetable)
+    if week is None:
+        with tracing.span("lookup", week=monday.isoformat()) as span:
+            week = decode_actual_week(timetable)
+            span.set(days=len(week.days), atoms=sum(map(len, week.days.values())))
+        account_client.weeks.put(monday, timetable, week)
+    return week
+
+
+@tool
+async def rozvrh(datum: str = None, obnovit: bool = False, diagnostika: bool = False) -> Dict[str, Any]:
+    """
+    Získá rozvrh pro zadané datum - aktuální rozvrh s dekódovanými informacemi.
+    
+    Args:
+        datum: Datum ve formátu YYYY-MM-DD. Pokud není zadáno, použije se dnešní datum.
+        obnovit: Pokud True, načte data přímo z Bakalářů a obejde cache.
+        diagnostika: Pokud True, přidá do odpovědi ladicí informace o učitelích (debug_teachers).
+    
+    Returns:
+        Dict obsahující rozvrh pro zadaný den se základními informacemi (hodina, vyučující, předmět)
+    """
+    try:
+        # Pokud není datum zadáno, použij dnešní
+        if not datum:
+            datum = datetime.now().strftime("%Y-%m-%d")
+        
+        # Validace formátu data
+        try:
+            parsed_date = datetime.strptime(datum, "%Y-%m-%d")
+        except ValueError:
+            return {
+                "error": "Neplatný formát data. Použij YYYY-MM-DD.",
+                "example": "2024-03-15"
+            }
+        datum = parsed_date.strftime("%Y-%m-%d")
+        
+        # Získáme den v týdnu (1=pondělí, 5=pátek)
+        day_of_week = parsed_date.weekday() + 1
+        
+        # Získáme aktuální rozvrh - je to kombinace stálého rozvrhu a změn.
+        # Bakaláři vrací celý týden, který se dekóduje jednou a den se pak jen vyhledá.
+        week = await get_week(week_start(parsed_date.date()), refresh=obnovit)
+        hodiny = [render_actual_lesson(atom) for atom in week.days.get(datum, ())]
+        
+        result = {
+            "datum": datum,
+            "den_tydne": day_of_week,
+            "hodiny": hodiny,
+            "pocet_hodin": len(hodiny)
+        }
+        if diagnostics.active(diagnostika):
+            result["debug_teachers"] = teachers_info(week.teachers)
+        return result
+        
+    except BakalariAuthError as e:
+        return {"error": f"Chyba autentizace: {e}"}
+    except BakalariRetryLaterError as e:
+        return retry_later(e)
+    except BakalariAPIError as e:
+        return {"error": f"Chyba API: {e}"}
+    except Exception as e:
+        return {"error": f"Neočekávaná chyba: {e}"}
+
+
+@tool
+async def rozvrh_rozsah(datum_od: str, datum_do: str, obnovit: bool = False) -> Dict[str, Any]:
+    """
+    Získá rozvrh pro rozsah dat (např. celý příští týden) jedním voláním.
+    Každý dotčený týden se z Bakalářů stáhne jen jednou a týdny se stahují souběžně.
+    
+    Args:
+        datum_od: Počáteční datum rozsahu ve formátu YYYY-MM-DD (včetně).
+        datum_do: Koncové datum rozsahu ve formátu YYYY-MM-DD (včetně).
+        obnovit: Pokud True, načte data přímo z Bakalářů a obejde cache.
+    
+    Returns:
+        Dict se seznamem dní v rozsahu, každý den obsahuje hodiny ve stejném tvaru jako nástroj rozvrh
+    """
+    try:
+        # Validace formátu data
+        try:
+            start = datetime.strptime(datum_od, "%Y-%m-%d").date()
+            end = datetime.strptime(datum_do, "%Y-%m-%d").date()
+        except ValueError:
+            return {
+                "error": "Neplatný formát data. Použij YYYY-MM-DD.",
+                "example": "2024-03-15"
+            }
+        
+        if end < start:
+            return {"error": "Datum 'datum_do' musí být stejné nebo pozdější než 'datum_od'."}
+        if (end - start).days >= MAX_RANGE_DAYS:
+            return {"error": f"Rozsah může mít nejvýše {MAX_RANGE_DAYS} dní."}
+        
+        # Endpoint /timetable/actual vrací vždy celý týden - stačí jeden dotaz na každý týden
+        mondays = []
+        monday = start - timedelta(days=start.weekday())
+        while monday <= end:
+            mondays.append(monday)
+            monday += timedelta(days=7)
+        
+        # Týdny se dekódují jednou (lookup tabulky jen jednou za týden) a sdílí se s nástrojem rozvrh
+        weeks = await asyncio.gather(*[get_week(monday, refresh=obnovit) for monday in mondays])
+        
+        od = start.isoformat()
+        do = end.isoformat()
+        dny = []
+        for week in weeks:
+            for day_date in sorted(week.days):
+                if not od <= day_date <= do:
+                    continue
+                hodiny = [render_actual_lesson(atom) for atom in week.days[day_date]]
+                dny.append({
+                    "datum": day_date,
+                    "den_tydne": week.days_of_week[day_date],
+                    "hodiny": hodiny,
+                    "pocet_hodin": len(hodiny)
+                })
+        
+        return {
+            "od": od,
+            "do": do,
+            "dny": dny,
+            "pocet_dni": len(dny),
+            "pocet_tydnu": len(mondays)
+        }
+        
+    except BakalariAuthError as e:
+        return {"error": f"Chyba autentizace: {e}"}
+    except BakalariRetryLaterError as e:
+        return retry_later(e)
+    except BakalariAPIError as e:
+        return {"error": f"Chyba API: {e}"}
+    except Exception as e:
+        return {"error": f"Neočekávaná chyba: {e}"}
+
+
+@tool
+async def absence(obnovit: bool = False) -> Dict[str, Any]:
+    """
+    Získá informace o absencích studenta.
+    
+    Args:
+        obnovit: Pokud True, načte data přímo z Bakalářů a obejde cache.
+    
+    Returns:
+        Dict obsahující absence podle dní a podle předmětů s detailními statistikami
+    """
+    try:
+        endpoint = "/api/3/absence/student"
+        report = await api_request(endpoint, refresh=obnovit)
+        
+        # Zpracování dat o absencích
+        formatted_absence = {
+            "typ": "absence",
+            "prah_procent": report.percentage_threshold,
+            "absence_podle_dni": [],
+            "absence_podle_predmetu": [],
+            "souhrn": {
+                "celkem_dni": 0,
+                "dny_s_absenci": 0,
+                "celkove_statistiky": {
+                    "nevyreseno": 0,
+                    "ok": 0,
+                    "zmeskano": 0,
+                    "pozdni_prichod": 0,
+                    "brzy_odchod": 0,
+                    "skolni_akce": 0,
+                    "distancni_vyuka": 0
+                }
+            }
+        }
+        
+        # Zpracování absencí podle dní
+        for den in report.days:
+            # Kontrola zda má den nějaké absence
+            celkem_hodin = den.total
+            if celkem_hodin > 0:
+                den_info = {
+                    "datum": den.date,
+                    "nevyreseno": den.unsolved,
+                    "ok": den.ok,
+                    "zmeskano": den.missed,
+                    "pozdni_prichod": den.late,
+                    "brzy_odchod": den.soon,
+                    "skolni_akce": den.school,
+                    "distancni_vyuka": den.distance_teaching,
+                    "celkem_hodin": celkem_hodin
+                }
+                formatted_absence["absence_podle_dni"].append(den_info)
+                formatted_absence["souhrn"]["dny_s_absenci"] += 1
+                
+                # Přičtení k celkovým statistikám
+                celkove = formatted_absence["souhrn"]["celkove_statistiky"]
+                for key in celkove:
+                    celkove[key] += den_info[key]
+            
+            formatted_absence["souhrn"]["celkem_dni"] += 1
+        
+        # Zpracování absencí podle předmětů
+        for predmet_data in report.subjects:
+            predmet_info = {
+                "nazev_predmetu": predmet_data.subject_name,
+                "pocet_hodin_celkem": predmet_data.lessons_count,
+                "zakladni_absence": predmet_data.base,
+                "pozdni_prichod": predmet_data.late,
+                "brzy_odchod": predmet_data.soon,
+                "skolni_akce": predmet_data.school,
+                "distancni_vyuka": predmet_data.distance_teaching
+            }
+            
+            # Výpočet procenta absence
+            predmet_info["procento_absence"] = predmet_data.percentage
+            predmet_info["nad_prahem"] = (predmet_data.lessons_count > 0 and
+                                          predmet_data.percentage > formatted_absence["prah_procent"] * 100)
+            
+            formatted_absence["absence_podle_predmetu"].append(predmet_info)
+        
+        # Seřazení předmětů podle procenta absence (sestupně)
+        formatted_absence["absence_podle_predmetu"].sort(
+            key=lambda x: x["procento_absence"], reverse=True
+        )
+        
+        # Seřazení dní podle data (nejnovější první)
+        formatted_absence["absence_podle_dni"].sort(
+            key=lambda x: x["datum"] if x["datum"] else "", reverse=True
+        )
+        
+        return formatted_absence
+        
+    except BakalariAuthError as e:
+        return {"error": f"Chyba autentizace: {e}"}
+    except BakalariRetryLaterError as e:
+        return retry_later(e)
+    except BakalariAPIError as e:
+        return {"error": f"Chyba API: {e}"}
+    except Exception as e:
+        return {"error": f"Neočekávaná chyba: {e}"}
+
+
+def render_permanent_day(day: TimetableDay) -> Dict[str, Any]:
+    """
+    Převede jeden den stálého rozvrhu z modelu do výstupního formátu nástrojů.
+    Hodiny modelu už odkazují na předměty, učitele a místnosti.
+    """
+    day_info = {
+        "den_tydne": day.day_of_week,
+        "den_cislo": day.day,
+        "hodiny": []
+    }
+    
+    # Seřadit atomy podle HourId
+    for atom in sorted(day.atoms, key=lambda a: a.hour_id or 0):
+        hour = atom.hour
+        if hour and hour.begin and hour.end:
+            cas = f"{hour.begin} - {hour.end}"
+        else:
+            cas = None
+        
+        subject = atom.subject
+        teacher = atom.teacher
+        group = atom.groups[0] if atom.groups else None
+        
+        day_info["hodiny"].append({
+            "hodina": hour.caption if hour else str(atom.hour_id),
+            "cas": cas,
+            "predmet": subject.name if subject else None,
+            "zkratka_predmetu": subject.abbrev if subject else None,
+            # Používáme konzistentně plné jméno učitele, pokud není k dispozici, použijeme zkratku
+            "ucitel": (teacher.name or teacher.abbrev) if teacher else None,
+            "ucitel_zkratka": teacher.abbrev if teacher else None,
+            "mistnost": atom.room.abbrev if atom.room else None,
+            "skupina": group.abbrev if group else None
+        })
+    
+    return day_info
+
+
+@tool
+async def staly_rozvrh(obnovit: bool = False, diagnostika: bool = False) -> Dict[str, Any]:
+    """
+    Získá stálý rozvrh (základní rozvrh bez změn).
+    
+    Args:
+        obnovit: Pokud True, načte data přímo z Bakalářů a obejde cache.
+        diagnostika: Pokud True, přidá do odpovědi ladicí informace (blok debug).
+    
+    Returns:
+        Dict obsahující stálý rozvrh
+    """
+    try:
+        endpoint = "/api/3/timetable/permanent"
+        timetable = await api_request(endpoint, refresh=obnovit)
+        
+        # Klient, který o to požádá, dostává po každém dni průběh jako MCP
+        # progress notifikaci
+        formatted_rozvrh = {
+            "typ": "staly_rozvrh",
+            "dny": []
+        }
+        
+        ctx = current_context()
+        total = len(timetable.days)
+        for index, day in enumerate(timetable.days, 1):
+            day_info = render_permanent_day(day)
+            formatted_rozvrh["dny"].append(day_info)
+            if ctx is not None:
+                await ctx.report_progress(index, total, f"Den {day_info['den_tydne']} dekódován")
+        
+        # Ladicí informace se sestavují jen v diagnostickém režimu
+        if diagnostics.active(diagnostika):
+            formatted_rozvrh["debug"] = permanent_timetable_info(timetable)
+        
+        return formatted_rozvrh
+        
+    except BakalariAuthError as e:
+        return {"error": f"Chyba autentizace: {e}"}
+    except BakalariRetryLaterError as e:
+        return retry_later(e)
+    except BakalariAPIError as e:
+        return {"error": f"Chyba API: {e}"}
+    except Exception as e:
+        return {"error": f"Neočekávaná chyba: {e}"}
+
+
+@tool
+async def znamky(
+    obnovit: bool = False,
+    predmet: str = None,
+    pole: str = None,
+    datum_od: str = None,
+    datum_do: str = None,
+    limit: int = None,
+    kurzor: str = None
+) -> Dict[str, Any]:
+    """
+    Získá známky studenta organizované podle předmětů.
+    Filtrování, výběr polí a stránkování probíhá na serveru, vrací se jen požadovaná část.
+    
+    Args:
+        obnovit: Pokud True, načte data přímo z Bakalářů a obejde cache.
+        predmet: Pouze známky z předmětu (název, zkratka nebo ID předmětu).
+        pole: Čárkou oddělený seznam polí známky (např. "nazev,znamka_text,vaha,datum_znamky").
+        datum_od: Pouze známky od data ve formátu YYYY-MM-DD (včetně).
+        datum_do: Pouze známky do data ve formátu YYYY-MM-DD (včetně).
+        limit: Maximální počet známek v odpovědi.
+        kurzor: Kurzor další stránky (hodnota dalsi_kurzor z předchozí odpovědi).
+    
+    Returns:
+        Dict obsahující předměty s jejich známkami, průměry a dalšími informacemi
+    """
+    try:
+        try:
+            fields = parse_fields(pole)
+        except ValueError as e:
+            return {
+                "error": f"{e}",
+                "dostupna_pole": list(MARK_FIELDS)
+            }
+        
+        try:
+            for value in (datum_od, datum_do):
+                if value:
+                    datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            return {
+                "error": "Neplatný formát data. Použij YYYY-MM-DD.",
+                "example": "2024-03-15"
+            }
+        
+        try:
+            offset = parse_cursor(kurzor)
+        except ValueError:
+            return {"error": "Neplatný kurzor. Použij hodnotu dalsi_kurzor z předchozí odpovědi."}
+        
+        if limit is not None and limit < 1:
+            return {"error": "Limit musí být kladné číslo."}
+        
+        endpoint = "/api/3/marks"
+        grade_book = await api_request(endpoint, refresh=obnovit)
+        
+        wanted_subject = predmet.strip().lower() if predmet else None
+        filter_marks = bool(datum_od or datum_do or limit is not None or offset)
+        
+        # Výběr předmětů a známek probíhá nad modelem, takže se převádí
+        # (a serializuje) jen ta část známek, která se skutečně vrátí
+        subjects = []
+        selected = []
+        for subject in grade_book.subjects:
+            if wanted_subject and wanted_subject not in (
+                str(subject.subject.id or "").strip().lower(),
+                (subject.subject.name or "").strip().lower(),
+                (subject.subject.abbrev or "").strip().lower()
+            ):
+                continue
+            
+            subject_marks = []
+            for mark in subject.marks:
+                mark_day = (mark.mark_date or "")[:10]
+                if datum_od and mark_day < datum_od:
+                    continue
+                if datum_do and mark_day > datum_do:
+                    continue
+                subject_marks.append(mark)
+            
+            # Seřazení známek podle data (nejnovější první)
+            subject_marks.sort(key=lambda m: (m.mark_date or "")[:10], reverse=True)
+            subjects.append((subject, subject_marks))
+        
+        # Seřazení předmětů podle názvu
+        subjects.sort(key=lambda s: s[0].subject.name or "")
+        
+        for subject, subject_marks in subjects:
+            selected.extend((subject, mark) for mark in subject_marks)
+        
+        total = len(selected)
+        end = total if limit is None else min(offset + limit, total)
+        page = selected[offset:end]
+        page_by_subject = {}
+        for subject, mark in page:
+            page_by_subject.setdefault(id(subject), []).append(mark)
+        
+        # Zpracování dat o známkách
+        formatted_marks = {
+            "typ": "znamky",  
+            "predmety": []
+        }
+        
+        for subject, subject_marks in subjects:
+            page_marks = page_by_subject.get(id(subject), [])
+            if filter_marks and not page_marks:
+                continue
+            formatted_marks["predmety"].append({
+                "predmet": {
+                    "id": subject.subject.id,
+                    "nazev": subject.subject.name,
+                    "zkratka": subject.subject.abbrev
+                },
+                "prumer": (subject.average_text or "").strip(),
+                "docasna_znamka": (subject.temporary_mark or "").strip(),
+                "poznamka_k_predmetu": (subject.subject_note or "").strip(),
+                "poznamka_k_docasne_znamce": (subject.temporary_mark_note or "").strip(),
+                "pouze_body": subject.points_only,
+                "predikce_povozena": subject.prediction_enabled,
+                "znamky": [format_mark(mark, fields) for mark in page_marks]
+            })
+        
+        # Přidání souhrnu (za všechny známky odpovídající filtru, nejen za stránku)
+        formatted_marks["souhrn"] = {
+            "celkem_predmetu": len(subjects),
+            "celkem_znamek": total,
+            "nove_znamky": sum(1 for _, mark in selected if mark.is_new),
+            "predmety_s_docasnou_znamkou": len([s for s, _ in subjects if (s.temporary_mark or "").strip()])
+        }
+        
+        if limit is not None or offset:
+            formatted_marks["strankovani"] = {
+                "kurzor": str(offset),
+                "limit": limit,
+                "vraceno": len(page),
+                "dalsi_kurzor": str(end) if end < total else None
+            }
+        
+        return formatted_marks
+        
+    except BakalariAuthError as e:
+        return {"error": f"Chyba autentizace: {e}"}
+    except BakalariRetryLaterError as e:
+        return retry_later(e)
+    except BakalariAPIError as e:
+        return {"error": f"Chyba API: {e}"}
+    except Exception as e:
+        return {"error": f"Neočekávaná chyba: {e}"}
+
+
+@tool
+async def nove_znamky(od: str = None, obnovit: bool = False) -> Dict[str, Any]:
+    """
+    Vrátí pouze nové nebo upravené známky - buď od zadaného data, nebo od posledního volání.
+    Server si pamatuje stav známek, takže se neposílá celý přehled známek.
+    
+    Args:
+        od: Datum (YYYY-MM-DD) nebo datum a čas (YYYY-MM-DDTHH:MM:SS). Vrátí známky zapsané
+            nebo upravené od tohoto okamžiku. Pokud není zadáno, vrátí změny od posledního volání.
+        obnovit: Pokud True, načte data přímo z Bakalářů a obejde cache.
+    
+    Returns:
+        Dict se seznamem nových a upravených známek (nejnovější první)
+    """
+    try:
+        if od:
+            try:
+                datetime.fromisoformat(od)
+            except ValueError:
+                return {
+                    "error": "Neplatný formát data. Použij YYYY-MM-DD nebo YYYY-MM-DDTHH:MM:SS.",
+                    "example": "2024-03-15"
+                }
+        
+        endpoint = "/api/3/marks"
+        grade_book = await api_request(endpoint, refresh=obnovit)
+        snapshot = (await get_client()).marks
+        previous_sync = snapshot.synced_at
+        first_sync = snapshot.marks is None
+        
+        # Aktuální stav: Id -> (EditDate, známka, předmět)
+        current = {}
+        for subject in grade_book.subjects:
+            subject_name = subject.subject.name
+            for mark in subject.marks:
+                edit_date = mark.edit_date or mark.mark_date or ""
+                current[str(mark.id)] = (edit_date, mark, subject_name)
+        
+        # Dotaz s explicitním datem nesmí posunout stav "od posledního volání",
+        # jinak by další volání bez data o změny mezi nimi přišlo
+        if od:
+            new, edited, removed = set(), set(), set()
+        else:
+            new, edited, removed = snapshot.sync({mark_id: item[0] for mark_id, item in current.items()})
+        
+        znamky_out = []
+        for mark_id, (edit_date, mark, subject_name) in current.items():
+            if od:
+                # Změny od zadaného okamžiku (ISO řetězce lze porovnávat lexikograficky)
+                if edit_date[:len(od)] < od:
+                    continue
+            elif first_sync:
+                # Bez předchozího stavu vrátíme známky, které Bakaláři označují jako nové
+                if not mark.is_new:
+                    continue
+            elif mark_id not in new and mark_id not in edited:
+                continue
+            
+            mark_info = format_mark(mark)
+            mark_info["predmet"] = subject_name
+            if not od and not first_sync:
+                mark_info["zmena"] = "nova" if mark_id in new else "upravena"
+            znamky_out.append(mark_info)
+        
+        znamky_out.sort(key=lambda x: (x["datum_editace"] or "", x["datum_znamky"] or ""), reverse=True)
+        
+        result = {
+            "typ": "nove_znamky",
+            "od": od or previous_sync,
+            "prvni_synchronizace": first_sync and not od,
+            "znamky": znamky_out,
+            "pocet": len(znamky_out),
+            "synchronizovano": snapshot.synced_at
+        }
+        if removed and not od:
+            result["odstranene_id"] = sorted(removed)
+        return result
+        
+    except BakalariAuthError as e:
+        return {"error": f"Chyba autentizace: {e}"}
+    except BakalariRetryLaterError as e:
+        return retry_later(e)
+    except BakalariAPIError as e:
+        return {"error": f"Chyba API: {e}"}
+    except Exception as e:
+        return {"error": f"Neočekávaná chyba: {e}"}
+
+
+def error_message(error: BaseException) -> str:
+    """Text chyby ve stejném tvaru, v jakém ji vrací jednotlivé nástroje"""
+    if isinstance(error, BakalariAuthError):
+        return f"Chyba autentizace: {error}"
+    if isinstance(error, BakalariAPIError):
+        return f"Chyba API: {error}"
+    return f"Neočekávaná chyba: {error}"
+
+
+def summarize_day(week: DecodedWeek, datum: str) -> Dict[str, Any]:
+    """Zkrácený rozvrh jednoho dne pro nástroj prehled"""
+    hodiny = []
+    for atom in week.days.get(datum, ()):
+        lesson = render_actual_lesson(atom)
+        hodina = {key: lesson[key] for key in ("hodina", "cas", "predmet", "ucitel", "mistnost")}
+        if "zmena" in lesson:
+            hodina["zmena"] = lesson["zmena"]["popis"] or lesson["zmena"]["typ"]
+        hodiny.append(hodina)
+    return {"hodiny": hodiny, "pocet_hodin": len(hodiny)}
+
+
+def summarize_new_marks(grade_book: GradeBook) -> Dict[str, Any]:
+    """Známky, které Bakaláři označují jako nové (stav nástroje nove_znamky se nemění)"""
+    znamky_out = []
+    for subject in grade_book.subjects:
+        for mark in subject.marks:
+            if mark.is_new:
+                mark_info = format_mark(mark, ["nazev", "znamka_text", "vaha", "datum_znamky"])
+                mark_info["predmet"] = subject.subject.name
+                znamky_out.append(mark_info)
+    znamky_out.sort(key=lambda x: x["datum_znamky"] or "", reverse=True)
+    return {"znamky": znamky_out, "pocet": len(znamky_out)}
+
+
+def summarize_absence(report: AbsenceReport) -> Dict[str, Any]:
+    """Souhrn absencí bez rozpisu po dnech"""
+    threshold = report.percentage_threshold * 100
+    return {
+        "nevyreseno": sum(day.unsolved for day in report.days),
+        "zmeskano": sum(day.missed for day in report.days),
+        "dny_s_absenci": sum(1 for day in report.days if day.total > 0),
+        "prah_procent": report.percentage_threshold,
+        "predmety_nad_prahem": [
+            {"nazev_predmetu": subject.subject_name, "procento_absence": subject.percentage}
+            for subject in report.subjects
+            if subject.lessons_count > 0 and subject.percentage > threshold
+        ]
+    }
+
+
+@tool
+async def prehled(datum: str = None, obnovit: bool = False) -> Dict[str, Any]:
+    """
+    Denní přehled jedním voláním: rozvrh na den, nové známky a souhrn absencí.
+    Všechny tři části se stahují souběžně za jeden přihlášený účet. Pokud některá
+    část selže, ostatní se vrátí a chyba se uvede v klíči chyby.
+    
+    Args:
+        datum: Datum rozvrhu ve formátu YYYY-MM-DD. Pokud není zadáno, použije se dnešní datum.
+        obnovit: Pokud True, načte data přímo z Bakalářů a obejde cache.
+    
+    Returns:
+        Dict s klíči rozvrh, nove_znamky a absence (a chyby, pokud některá část selhala)
+    """
+    try:
+        if not datum:
+            datum = datetime.now().strftime("%Y-%m-%d")
+        
+        try:
+            parsed_date = datetime.strptime(datum, "%Y-%m-%d")
+        except ValueError:
+            return {
+                "error": "Neplatný formát data. Použij YYYY-MM-DD.",
+                "example": "2024-03-15"
+            }
+        datum = parsed_date.strftime("%Y-%m-%d")
+        
+        # Účet a token se získají jednou předem, souběžné požadavky je pak jen sdílí
+        account_client = await get_client()
+        await account_client.tokens.token()
+        
+        week, grade_book, report = await asyncio.gather(
+            get_week(week_start(parsed_date.date()), refresh=obnovit, account_client=account_client),
+            account_client.request("/api/3/marks", refresh=obnovit),
+            account_client.request("/api/3/absence/student", refresh=obnovit),
+            return_exceptions=True
+        )
+        
+        result = {
+            "typ": "prehled",
+            "datum": datum,
+            "den_tydne": parsed_date.weekday() + 1
+        }
+        chyby = {}
+        for key, value, summarize in (
+            ("rozvrh", week, lambda w: summarize_day(w, datum)),
+            ("nove_znamky", grade_book, summarize_new_marks),
+            ("absence", report, summarize_absence)
+        ):
+            if isinstance(value, BaseException):
+                chyby[key] = error_message(value)
+                result[key] = None
+            else:
+                result[key] = summarize(value)
+        if chyby:
+            result["chyby"] = chyby
+        return result
+        
+    except BakalariAuthError as e:
+        return {"error": f"Chyba autentizace: {e}"}
+    except BakalariRetryLaterError as e:
+        return retry_later(e)
+    except BakalariAPIError as e:
+        return {"error": f"Chyba API: {e}"}
+    except Exception as e:
+        return {"error": f"Neočekávaná chyba: {e}"}
+
+
+@tool
+async def statistiky() -> Dict[str, Any]:
+    """
+    Vrátí provozní statistiky serveru (connection pool, cache, slučování požadavků
+    a token aktuálního účtu, registr účtů).
+    
+    Returns:
+        Dict se statistikami jednotlivých vrstev klienta
+    """
+    try:
+        account_stats = (await get_client()).stats()
+    except (BakalariAuthError, BakalariAPIError):
+        account_stats = {}
+    return {
+        "typ": "statistiky",
+        **account_stats,
+        "registr_uctu": registry.stats(),
+        "limity_serveru": registry.limiters.stats(),
+        "jistice_serveru": registry.breakers.stats(),
+        "json_backend": json_backend.BACKEND,
+        "parser_zmen": change_parser.stats(),
+        "trasovani": tracing.stats(),
+        "profilovani": profiling.profiler.planned or None,
+        "disk_cache": await disk_cache.stats() if disk_cache is not None else None
+    }
+
+
+async def profilovani(token: str, nastroj: str = None, pocet: int = 1) -> Dict[str, Any]:
+    """
+    Administrátorský nástroj: naplánuje profilování příštích volání nástroje
+    (cProfile, výsledek jako .prof soubor) a vrátí souhrny posledních profilů.
+    Registruje se, jen pokud je nastaven BAKALARI_ADMIN_TOKEN.
+    
+    Args:
+        token: Hodnota BAKALARI_ADMIN_TOKEN.
+        nastroj: Název nástroje k profilování (bez něj se jen vrátí výsledky).
+        pocet: Počet příštích volání k profilování (0 plán zruší).
+    
+    Returns:
+        Dict s naplánovanými profilováními, adresářem profilů a souhrny nejdražších funkcí
+    """
+    if not profiling.ADMIN_TOKEN or not hmac.compare_digest(token.encode(), profiling.ADMIN_TOKEN.encode()):
+        return {"error": "Neplatný administrátorský token"}
+    if nastroj is not None:
+        if nastroj not in TOOL_NAMES:
+            return {
+                "error": f"Neznámý nástroj: {nastroj}",
+                "dostupne_nastroje": TOOL_NAMES
+            }
+        if pocet < 0:
+            return {"error": "Počet volání nesmí být záporný."}
+        profiling.profiler.schedule(nastroj, pocet)
+    return {
+        "typ": "profilovani",
+        **profiling.profiler.stats()
+    }
+
+
+# Skrytý nástroj - bez administrátorského tokenu ho klienti vůbec neuvidí
+if profiling.ADMIN_TOKEN:
+    tool(profilovani)
+
+
+def collect_metrics() -> List[metrics.Metric]:
+    """Okamžité hodnoty pro /metrics: účty, spojení v poolech, cache, limity a jističe serverů škol"""
+    clients = registry.clients()
+    accounts = metrics.Gauge("bakalari_accounts", "Počet účtů v registru")
+    accounts.set(len(clients))
+    connections = metrics.Gauge("bakalari_pool_connections", "Spojení v HTTP poolech všech účtů podle stavu", ("state",))
+    connections_limit = metrics.Gauge("bakalari_pool_connections_limit", "Součet limitů spojení HTTP poolů všech účtů")
+    cache_bytes = metrics.Gauge("bakalari_cache_bytes", "Velikost odpovědí v paměťových cache všech účtů")
+    connections.set(0, "active")
+    connections.set(0, "idle")
+    connections_limit.set(0)
+    cache_bytes.set(0)
+    for account_client in clients:
+        pool = account_client.pool.stats()
+        connections.inc("active", amount=pool["spojeni_aktivni"])
+        connections.inc("idle", amount=pool["spojeni_necinna"])
+        connections_limit.inc(amount=pool["limit"])
+        cache_bytes.inc(amount=account_client.cache.stats()["velikost_bajtu"])
+
+    in_flight = metrics.Gauge("bakalari_upstream_in_flight", "Probíhající požadavky na server školy", ("server",))
+    queued = metrics.Gauge("bakalari_upstream_queued", "Požadavky čekající na limit zátěže serveru školy", ("server",))
+    for url, limiter in registry.limiters.stats().items():
+        in_flight.set(limiter["probihajici"], url)
+        queued.set(limiter["ve_fronte"], url)
+    breaker_open = metrics.Gauge("bakalari_circuit_open", "Rozpojený jistič serveru školy (1) nebo sepnutý (0)", ("server",))
+    for url, breaker in registry.breakers.stats().items():
+        breaker_open.set(1 if breaker["stav"] == "rozpojeny" else 0, url)
+    return [accounts, connections, connections_limit, cache_bytes, in_flight, queued, breaker_open]
+
+
+metrics.register_collector(collect_metrics)
+
+
+async def readiness() -> Dict[str, Any]:
+    """
+    Připravenost serveru přijímat volání (endpoint /ready). Pokud je zadán výchozí
+    účet, musí být přihlášený (případně se přihlásí) a jistič jeho serveru nesmí být
+    rozpojený. Bez výchozího účtu se účty přihlašují až z hlaviček požadavků.
+    """
+    problemy = []
+    if default_url and default_user and default_password:
+        default_client = await registry.get(default_url, default_user, default_password, pinned=True)
+        if default_client.breaker.is_open:
+            problemy.append(f"Jistič serveru {default_client.server_url} je rozpojený")
+        else:
+            try:
+                await default_client.tokens.token()
+            except (BakalariAuthError, BakalariAPIError) as e:
+                problemy.append(f"Výchozí účet není přihlášen: {e}")
+    return {"pripraveno": not problemy, "problemy": problemy}
+
+
+def add_arguments(parser: argparse.ArgumentParser, credentials_required: bool = False) -> None:
+    """Přidá parametry společné pro všechny transporty"""
+    if credentials_required:
+        parser.add_argument("--user", required=True, help="Uživatelské jméno")
+        parser.add_argument("--password", required=True, help="Heslo")
+    else:
+        parser.add_argument("--user", help="Uživatelské jméno výchozího účtu")
+        parser.add_argument("--password", help="Heslo výchozího účtu")
+    parser.add_argument("--url", default="skola.bakalari.cz", help="URL Bakaláři serveru")
+    parser.add_argument("--no-cache", action="store_true", help="Vypne cache odpovědí API")
+    parser.add_argument("--disk-cache", help="Cesta k perzistentní cache odpovědí (SQLite soubor nebo adresář)")
+    parser.add_argument("--diagnostics", action="store_true", help="Přidá do odpovědí ladicí informace")
+
+
+def configure(args: argparse.Namespace) -> None:
+    """Nastaví výchozí účet, cache a diagnostiku podle parametrů příkazové řádky"""
+    global default_url, default_user, default_password, disk_cache
+    
+    if args.diagnostics:
+        diagnostics.enabled = True
+    
+    if args.no_cache:
+        registry.cache_enabled = False
+    else:
+        disk_cache = DiskCache.from_env(args.disk_cache)
+        registry.disk_cache = disk_cache
+    
+    # URL se normalizuje (přidání https:// prefixu pokud chybí)
+    default_url = normalize_url(args.url)
+    registry.allowed.allow(default_url)
+    default_user = args.user
+    default_password = args.password
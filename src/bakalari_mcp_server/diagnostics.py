@@ -0,0 +1,69 @@
+"""
+Diagnostický režim nástrojů.
+Ladicí informace (ukázky dat učitelů a rozvrhu, první atom rozvrhu) se počítají
+jen v diagnostickém režimu - běžné odpovědi je vůbec nesestavují.
+"""
+
+import os
+from typing import Optional, Dict, Any
+
+from .models import Atom, Teacher, Timetable
+
+
+class Diagnostics:
+    """Přepínač diagnostického režimu (parametr --diagnostics nebo BAKALARI_DIAGNOSTICS)"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+
+    @classmethod
+    def from_env(cls) -> "Diagnostics":
+        return cls(enabled=os.environ.get("BAKALARI_DIAGNOSTICS", "0") in ("1", "true", "yes"))
+
+    def active(self, requested: bool = False) -> bool:
+        """True pokud je diagnostika zapnutá globálně nebo vyžádaná argumentem nástroje"""
+        return self.enabled or requested
+
+
+def teachers_info(teachers: Dict[Any, Teacher]) -> Dict[str, Any]:
+    """Diagnostika překladu učitelů v aktuálním rozvrhu"""
+    sample = next(iter(teachers.values()), None)
+    return {
+        "lookup": [(k, v.name, v.abbrev) for k, v in teachers.items()],
+        "sample_teacher": sample._asdict() if sample else None
+    }
+
+
+def permanent_timetable_info(timetable: Timetable) -> Dict[str, Any]:
+    """Diagnostika stálého rozvrhu: velikosti lookup tabulek, ukázka dat a první atom"""
+    info = {
+        "lookup_count": {
+            "hours": len(timetable.hours),
+            "subjects": len(timetable.subjects),
+            "teachers": len(timetable.teachers),
+            "rooms": len(timetable.rooms),
+            "groups": len(timetable.groups)
+        },
+        "has_days": bool(timetable.days),
+        "days_count": len(timetable.days),
+        "data_sample": repr(timetable.days[:1])[:500] if timetable.days else "No data",
+        "teachers_sample": [teacher._asdict() for teacher in list(timetable.teachers.values())[:3]]
+    }
+
+    first_atom = _first_atom(timetable)
+    if first_atom is not None:
+        info["first_atom"] = {
+            "hour_id": first_atom.hour_id,
+            "subject_id": first_atom.subject.id if first_atom.subject else None,
+            "teacher_id": first_atom.teacher.id if first_atom.teacher else None,
+            "room_id": first_atom.room.id if first_atom.room else None,
+            "teacher_lookup_result": first_atom.teacher._asdict() if first_atom.teacher else {}
+        }
+    return info
+
+
+def _first_atom(timetable: Timetable) -> Optional[Atom]:
+    # První hodina prvního dne (atomy jsou ve výstupu seřazené podle HourId)
+    if not timetable.days or not timetable.days[0].atoms:
+        return None
+    return min(timetable.days[0].atoms, key=lambda a: a.hour_id or 0)
@@ -0,0 +1,206 @@
+"""
+Perzistentní úložiště odpovědí Bakaláři API v SQLite.
+Uchovává surová těla odpovědí spolu s ETag/Last-Modified a časem stažení,
+aby po restartu mohl server odpovídat okamžitě a data revalidovat na pozadí.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from functools import partial
+from typing import Optional, Dict, Any
+
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+# Po kompakci zůstane nejvýše tento podíl limitu, aby se nekompaktovalo po každém zápisu
+COMPACT_TARGET_RATIO = 0.8
+
+
+class StoredResponse:
+    """Odpověď načtená z disku"""
+
+    __slots__ = ("key", "body", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, key: str, body: bytes, etag: Optional[str], last_modified: Optional[str], fetched_at: float):
+        self.key = key
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Hlavičky pro podmíněný GET (revalidaci)"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class DiskCache:
+    """SQLite úložiště s limitem velikosti; blokující operace běží v thread poolu"""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, max_age: float = DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.reads = 0
+        self.hits = 0
+        self.writes = 0
+        self.revalidated = 0
+        self.compactions = 0
+
+    @classmethod
+    def from_env(cls, path: Optional[str] = None) -> Optional["DiskCache"]:
+        """
+        Vytvoří úložiště podle BAKALARI_DISK_CACHE (cesta k souboru nebo adresáři).
+        Pokud cesta není zadána, perzistentní cache je vypnutá a vrací se None.
+        """
+        path = path or os.environ.get("BAKALARI_DISK_CACHE")
+        if not path:
+            return None
+        if os.path.isdir(path):
+            path = os.path.join(path, "bakalari-cache.sqlite3")
+        return cls(
+            path,
+            max_bytes=int(os.environ.get("BAKALARI_DISK_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES))),
+            max_age=float(os.environ.get("BAKALARI_DISK_CACHE_MAX_AGE", str(DEFAULT_MAX_AGE))),
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " body BLOB NOT NULL,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " fetched_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def _get(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self.reads += 1
+            if row is None:
+                return None
+            if time.time() - row[3] > self.max_age:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return StoredResponse(key, row[0], row[1], row[2], row[3])
+
+    def _put(self, key: str, body: bytes, etag: Optional[str], last_modified: Optional[str]) -> None:
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, etag, last_modified, fetched_at, accessed_at, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, body, etag, last_modified, now, now, len(body)),
+            )
+            self.writes += 1
+            if self._total_size(conn) > self.max_bytes:
+                self._compact_locked(conn)
+
+    def _touch(self, key: str) -> None:
+        with self._lock:
+            now = time.time()
+            self._connection().execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+            )
+            self.revalidated += 1
+
+    @staticmethod
+    def _total_size(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _compact_locked(self, conn: sqlite3.Connection) -> None:
+        # Smažeme prošlé záznamy a pak nejdéle nepoužité, dokud nejsme pod cílovou velikostí
+        conn.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - self.max_age,))
+        target = int(self.max_bytes * COMPACT_TARGET_RATIO)
+        total = self._total_size(conn)
+        if total > target:
+            rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+            doomed = []
+            for key, size in rows:
+                if total <= target:
+                    break
+                doomed.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        conn.execute("VACUUM")
+        self.compactions += 1
+
+    def _compact(self) -> None:
+        with self._lock:
+            self._compact_locked(self._connection())
+
+    def _stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connection()
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "cesta": self.path,
+            "polozky": count,
+            "velikost_bajtu": size,
+            "limit_bajtu": self.max_bytes,
+            "max_stari_s": self.max_age,
+            "cteni": self.reads,
+            "zasahy": self.hits,
+            "zapisy": self.writes,
+            "revalidovano": self.revalidated,
+            "kompakce": self.compactions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, partial(func, *args))
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        """Načte uloženou odpověď, pokud existuje a není starší než max_age"""
+        return await self._run(self._get, key)
+
+    async def put(self, key: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Uloží (nebo nahradí) odpověď; při překročení limitu provede kompakci"""
+        await self._run(self._put, key, body, etag, last_modified)
+
+    async def touch(self, key: str) -> None:
+        """Označí uloženou odpověď jako čerstvě ověřenou (po odpovědi 304)"""
+        await self._run(self._touch, key)
+
+    async def compact(self) -> None:
+        """Odstraní prošlé a nejdéle nepoužité záznamy a zmenší soubor databáze"""
+        await self._run(self._compact)
+
+    async def stats(self) -> Dict[str, Any]:
+        return await self._run(self._stats)
@@ -0,0 +1,40 @@
+"""
+Výjimky klienta Bakaláři API.
+"""
+
+
+class BakalariAuthError(Exception):
+    """Chyba při autentizaci s Bakaláři API"""
+    pass
+
+
+class BakalariAPIError(Exception):
+    """Obecná chyba API"""
+    pass
+
+
+class BakalariUnavailableError(BakalariAPIError):
+    """Server školy neodpovídá (chyba spojení, vypršení časového limitu, odpověď 429/5xx)"""
+    pass
+
+
+class BakalariRetryLaterError(BakalariAPIError):
+    """
+    Požadavek nebyl odeslán, má smysl ho zopakovat za retry_after sekund.
+    Atribut flag je klíč, kterým nástroje chybu označí ve své odpovědi.
+    """
+    flag = "opakovat"
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BakalariRateLimitError(BakalariRetryLaterError):
+    """Požadavek nebyl odeslán - překročen limit zátěže serveru školy"""
+    flag = "pretizeno"
+
+
+class BakalariCircuitOpenError(BakalariRetryLaterError, BakalariUnavailableError):
+    """Požadavek nebyl odeslán - jistič serveru školy je po opakovaných výpadcích rozpojený"""
+    flag = "server_nedostupny"
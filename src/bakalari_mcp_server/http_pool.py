@@ -0,0 +1,92 @@
+"""
+Sdílený HTTP pool pro komunikaci s Bakaláři API.
+Drží jednu dlouhožijící aiohttp session (a tím i TCP/TLS spojení a DNS cache)
+pro celý proces serveru místo vytváření nové session pro každý požadavek.
+"""
+
+import os
+from typing import Optional, Dict, Any
+
+import aiohttp
+
+
+class HttpPool:
+    """Líně vytvářená aiohttp session s konfigurovatelným connection poolem"""
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 15.0,
+        total_timeout: float = 30.0,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        # Explicitní časové limity - navázání spojení, čekání na data a celý požadavek
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout, sock_read=read_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self.sessions_created = 0
+
+    @classmethod
+    def from_env(cls) -> "HttpPool":
+        """Vytvoří pool s nastavením z proměnných prostředí BAKALARI_POOL_* a BAKALARI_TIMEOUT_*"""
+        return cls(
+            limit=int(os.environ.get("BAKALARI_POOL_LIMIT", "100")),
+            limit_per_host=int(os.environ.get("BAKALARI_POOL_LIMIT_PER_HOST", "10")),
+            keepalive_timeout=float(os.environ.get("BAKALARI_POOL_KEEPALIVE", "30")),
+            dns_cache_ttl=int(os.environ.get("BAKALARI_POOL_DNS_TTL", "300")),
+            connect_timeout=float(os.environ.get("BAKALARI_TIMEOUT_CONNECT", "5")),
+            read_timeout=float(os.environ.get("BAKALARI_TIMEOUT_READ", "15")),
+            total_timeout=float(os.environ.get("BAKALARI_TIMEOUT_TOTAL", "30")),
+        )
+
+    async def session(self) -> aiohttp.ClientSession:
+        """Vrátí sdílenou session, případně ji vytvoří (i po předchozím zavření)"""
+        if self._session is None or self._session.closed:
+            self._connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=self.dns_cache_ttl > 0,
+            )
+            self._session = aiohttp.ClientSession(connector=self._connector, timeout=self.timeout)
+            self.sessions_created += 1
+        return self._session
+
+    async def close(self) -> None:
+        """Zavře session včetně všech otevřených spojení"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._connector = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistiky poolu - počet otevřených, aktivních a nečinných spojení"""
+        connector = self._connector
+        active = 0
+        idle = 0
+        if connector is not None and not connector.closed:
+            # aiohttp nemá veřejné API pro stav poolu, čteme interní struktury
+            active = len(getattr(connector, "_acquired", ()))
+            idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        return {
+            "session_otevrena": self._session is not None and not self._session.closed,
+            "spojeni_otevrena": active + idle,
+            "spojeni_aktivni": active,
+            "spojeni_necinna": idle,
+            "limit": self.limit,
+            "limit_na_host": self.limit_per_host,
+            "keepalive_s": self.keepalive_timeout,
+            "dns_cache_ttl_s": self.dns_cache_ttl,
+            "timeout_spojeni_s": self.timeout.connect,
+            "timeout_cteni_s": self.timeout.sock_read,
+            "timeout_celkem_s": self.timeout.total,
+            "vytvoreno_session": self.sessions_created,
+        }
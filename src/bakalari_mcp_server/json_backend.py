@@ -0,0 +1,68 @@
+"""
+Zásuvný JSON backend pro dekódování odpovědí API a serializaci výsledků nástrojů.
+Použije orjson nebo msgspec, pokud jsou nainstalované (pip install bakalari-mcp[fast]),
+jinak standardní modul json. Konkrétní backend lze vynutit proměnnou
+BAKALARI_JSON_BACKEND (orjson, msgspec, json).
+"""
+
+import json
+import os
+from typing import Any, Callable, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _default(obj: Any) -> Any:
+    # Neznámé typy jako text (stejně jako FastMCP); výsledky nástrojů modely neobsahují
+    return str(obj)
+
+
+def _orjson_backend() -> Tuple[Callable[[Any], Any], Callable[[Any], str]]:
+    return orjson.loads, lambda obj: orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
+def _msgspec_backend() -> Tuple[Callable[[Any], Any], Callable[[Any], str]]:
+    decoder = msgspec.json.Decoder()
+    encoder = msgspec.json.Encoder(enc_hook=_default)
+    return decoder.decode, lambda obj: encoder.encode(obj).decode("utf-8")
+
+
+def _stdlib_backend() -> Tuple[Callable[[Any], Any], Callable[[Any], str]]:
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+    return json.loads, encoder.encode
+
+
+_BACKENDS = {
+    "orjson": (lambda: orjson is not None, _orjson_backend),
+    "msgspec": (lambda: msgspec is not None, _msgspec_backend),
+    "json": (lambda: True, _stdlib_backend),
+}
+
+
+def select_backend(preferred: str = "") -> str:
+    """Vybere backend: preferovaný (pokud je dostupný), jinak první dostupný z orjson, msgspec, json"""
+    order = [preferred] if preferred in _BACKENDS else []
+    order += [name for name in _BACKENDS if name not in order]
+    return next(name for name in order if _BACKENDS[name][0]())
+
+
+BACKEND = select_backend(os.environ.get("BAKALARI_JSON_BACKEND", "").lower())
+_loads, _dumps = _BACKENDS[BACKEND][1]()
+
+
+def loads(data: Any) -> Any:
+    """Dekóduje JSON (bytes nebo str)"""
+    return _loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Zakóduje objekt do kompaktního JSON textu (UTF-8, bez escapování diakritiky)"""
+    return _dumps(obj)
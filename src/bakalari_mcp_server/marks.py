@@ -0,0 +1,111 @@
+"""
+Zpracování známek: převod do výstupního formátu, výběr polí, stránkování
+a sledování změn mezi jednotlivými voláními.
+Server si pamatuje snapshot Id známek a jejich EditDate, takže rozdíl oproti
+poslednímu stavu se spočítá na serveru a klientovi se posílají jen změny.
+"""
+
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Set, Tuple
+
+from .models import Mark
+
+
+# Pole známky ve výstupu nástrojů (lze je vybírat parametrem pole)
+MARK_FIELDS = (
+    "id", "datum_znamky", "datum_editace", "nazev", "tema", "znamka_text",
+    "ucitel_id", "typ", "typ_poznamka", "vaha", "predmet_id", "je_nova",
+    "je_bodova", "vypocitana_znamka", "poradi_ve_tride", "body_text",
+    "max_bodu", "procento",
+)
+
+
+def parse_fields(pole: Optional[str]) -> Optional[List[str]]:
+    """
+    Rozparsuje seznam polí oddělených čárkou. Vrací None, pokud se mají vrátit všechna pole.
+    Při neznámém poli vyhodí ValueError.
+    """
+    if not pole:
+        return None
+    fields = [field.strip() for field in pole.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in MARK_FIELDS]
+    if unknown:
+        raise ValueError(f"Neznámá pole: {', '.join(unknown)}")
+    return fields or None
+
+
+def parse_cursor(kurzor: Optional[str]) -> int:
+    """Kurzor stránkování je pozice první známky další stránky"""
+    if not kurzor:
+        return 0
+    offset = int(kurzor)
+    if offset < 0:
+        raise ValueError(kurzor)
+    return offset
+
+
+def format_mark(mark: Mark, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Převede jednu známku z modelu do výstupního formátu nástrojů.
+    Pokud je zadán seznam polí (fields), vrátí jen tato pole.
+    """
+    mark_info = {
+        "id": mark.id,
+        "datum_znamky": mark.mark_date.split("T")[0] if mark.mark_date else None,
+        "datum_editace": mark.edit_date.split("T")[0] if mark.edit_date else None,
+        "nazev": (mark.caption or "").strip(),
+        "tema": (mark.theme or "").strip(),
+        "znamka_text": (mark.mark_text or "").strip(),
+        "ucitel_id": mark.teacher_id,
+        "typ": mark.type,
+        "typ_poznamka": (mark.type_note or "").strip(),
+        "vaha": mark.weight,
+        "predmet_id": mark.subject_id,
+        "je_nova": mark.is_new,
+        "je_bodova": mark.is_points,
+        "vypocitana_znamka": (mark.calculated_mark_text or "").strip(),
+        "poradi_ve_tride": mark.class_rank_text,
+        "body_text": (mark.points_text or "").strip(),
+        "max_bodu": mark.max_points
+    }
+    
+    # Přidání informací o bodování pokud je známka bodová
+    if mark_info["je_bodova"] and mark_info["max_bodu"] > 0:
+        try:
+            body_ziskane = float(mark_info["znamka_text"])
+            mark_info["procento"] = round((body_ziskane / mark_info["max_bodu"]) * 100, 2)
+        except (ValueError, ZeroDivisionError):
+            mark_info["procento"] = None
+    
+    if fields is not None:
+        return {field: mark_info.get(field) for field in fields}
+    return mark_info
+
+
+class MarksSnapshot:
+    """Poslední známý stav známek jednoho účtu (Id známky -> EditDate)"""
+
+    __slots__ = ("marks", "synced_at")
+
+    def __init__(self):
+        self.marks: Optional[Dict[str, str]] = None
+        self.synced_at: Optional[str] = None
+
+    def sync(self, current: Dict[str, str]) -> Tuple[Set[str], Set[str], Set[str]]:
+        """
+        Porovná aktuální stav s uloženým snapshotem a snapshot nahradí.
+        Vrací množiny Id nových, upravených a odstraněných známek.
+        Při první synchronizaci (bez snapshotu) jsou všechny množiny prázdné.
+        """
+        previous = self.marks
+        self.marks = current
+        self.synced_at = datetime.now().isoformat(timespec="seconds")
+        if previous is None:
+            return set(), set(), set()
+        new = {mark_id for mark_id in current if mark_id not in previous}
+        edited = {
+            mark_id for mark_id, edit_date in current.items()
+            if mark_id in previous and previous[mark_id] != edit_date
+        }
+        removed = {mark_id for mark_id in previous if mark_id not in current}
+        return new, edited, removed
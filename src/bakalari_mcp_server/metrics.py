@@ -0,0 +1,155 @@
+"""
+Metriky serveru v textovém formátu Prometheus (endpoint /metrics HTTP serveru).
+Počítadla a histogramy jsou společné pro celý proces a plní se přímo tam, kde
+událost nastane (volání nástroje, požadavek na server školy, přihlášení, cache),
+takže přežijí i uvolnění účtu z registru. Okamžité hodnoty (spojení v poolu,
+fronty limitů, stav jističů) dodávají při každém čtení registrované kolektory.
+"""
+
+import math
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Hranice histogramů latence v sekundách
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """Společný základ metrik: název, popis a hodnoty podle štítků"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self.samples()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, description, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for label_values, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *label_values: str) -> None:
+        self.values[label_values] = value
+
+    def dec(self, *label_values: str, amount: float = 1.0) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Štítky -> (počty v jednotlivých hranicích, součet, počet)
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        row = self.values.get(label_values)
+        if row is None:
+            row = self.values[label_values] = [0.0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                row[index] += 1
+                break
+        row[-2] += value
+        row[-1] += 1
+
+    def samples(self) -> Iterator[str]:
+        for label_values, row in sorted(self.values.items()):
+            cumulative = 0.0
+            for index, bound in enumerate(self.buckets):
+                cumulative += row[index]
+                labels = _format_labels(self.labels, label_values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {_format_value(cumulative)}"
+            labels = _format_labels(self.labels, label_values, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {_format_value(row[-1])}"
+            yield f"{self.name}_sum{_format_labels(self.labels, label_values)} {_format_value(row[-2])}"
+            yield f"{self.name}_count{_format_labels(self.labels, label_values)} {_format_value(row[-1])}"
+
+
+tool_calls = Counter("bakalari_tool_calls_total", "Počet volání nástrojů podle výsledku (ok, chyba, vyjimka)", ("tool", "result"))
+tool_duration = Histogram("bakalari_tool_duration_seconds", "Doba volání nástroje včetně serializace výsledku", ("tool",))
+tools_in_flight = Gauge("bakalari_tools_in_flight", "Právě probíhající volání nástrojů", ("tool",))
+upstream_duration = Histogram(
+    "bakalari_upstream_request_duration_seconds",
+    "Doba HTTP požadavku na server školy podle endpointu a stavového kódu (timeout, chyba_spojeni)",
+    ("endpoint", "status"),
+)
+auth_events = Counter("bakalari_auth_total", "Přihlášení a obnovení tokenu podle druhu", ("event",))
+cache_events = Counter(
+    "bakalari_cache_events_total",
+    "Události cache odpovědí podle rodiny endpointu (hits, misses, expired, stale, evictions, refreshes)",
+    ("family", "event"),
+)
+
+_METRICS: Tuple[Metric, ...] = (tool_calls, tool_duration, tools_in_flight, upstream_duration, auth_events, cache_events)
+_collectors: List[Callable[[], Iterable[Metric]]] = []
+
+
+def register_collector(collector: Callable[[], Iterable[Metric]]) -> None:
+    """Přidá kolektor, který při každém čtení metrik vrátí aktuální hodnoty (obvykle Gauge)"""
+    _collectors.append(collector)
+
+
+def cache_hit_ratio() -> Gauge:
+    """Podíl zásahů cache odpovědí od startu procesu podle rodiny endpointu"""
+    gauge = Gauge("bakalari_cache_hit_ratio", "Podíl zásahů cache odpovědí od startu procesu", ("family",))
+    families = {family for family, _ in cache_events.values}
+    for family in families:
+        hits = cache_events.values.get((family, "hits"), 0.0)
+        misses = cache_events.values.get((family, "misses"), 0.0)
+        if hits + misses:
+            gauge.set(round(hits / (hits + misses), 4), family)
+    return gauge
+
+
+def render() -> str:
+    """Všechny metriky v textovém formátu Prometheus 0.0.4"""
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    lines.extend(cache_hit_ratio().render())
+    for collector in _collectors:
+        for metric in collector():
+            lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,317 @@
+"""
+Kompaktní interní model dat Bakaláři API.
+JSON odpověď se převede do modelu jednou (při stažení nebo načtení z disku)
+a v cache se drží už jen model. Objekty jsou NamedTuple (bez __dict__),
+opakující se řetězce (zkratky, názvy, časy) jsou internované a hodiny rozvrhu
+odkazují přímo na sdílené objekty předmětů, učitelů a místností, takže se při
+dekódování už nic nevyhledává podle ID.
+"""
+
+import sys
+from typing import NamedTuple, Optional, Dict, Any, Tuple
+
+
+def _s(value: Any) -> Any:
+    """Internuje řetězce, ostatní hodnoty vrací beze změny"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Hour(NamedTuple):
+    id: Any
+    caption: Optional[str]
+    begin: Optional[str]
+    end: Optional[str]
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "Hour":
+        return cls(data.get("Id"), _s(data.get("Caption")), _s(data.get("BeginTime")), _s(data.get("EndTime")))
+
+
+class Subject(NamedTuple):
+    id: Any
+    abbrev: Optional[str]
+    name: Optional[str]
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "Subject":
+        return cls(_s(data.get("Id")), _s(data.get("Abbrev")), _s(data.get("Name")))
+
+
+class Teacher(NamedTuple):
+    id: Any
+    abbrev: Optional[str]
+    name: Optional[str]
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "Teacher":
+        return cls(_s(data.get("Id")), _s(data.get("Abbrev")), _s(data.get("Name")))
+
+
+class Room(NamedTuple):
+    id: Any
+    abbrev: Optional[str]
+    name: Optional[str]
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "Room":
+        return cls(_s(data.get("Id")), _s(data.get("Abbrev")), _s(data.get("Name")))
+
+
+class Group(NamedTuple):
+    id: Any
+    abbrev: Optional[str]
+    name: Optional[str]
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "Group":
+        return cls(_s(data.get("Id")), _s(data.get("Abbrev")), _s(data.get("Name")))
+
+
+class Change(NamedTuple):
+    """Změna hodiny v aktuálním rozvrhu (suplování, zrušení, spojení)"""
+    type: Optional[str]
+    description: str
+
+
+class Atom(NamedTuple):
+    """Jedna hodina rozvrhu s již přeloženými odkazy na hodinu, předmět, učitele a místnost"""
+    hour_id: Any
+    hour: Optional[Hour]
+    subject: Optional[Subject]
+    teacher: Optional[Teacher]
+    room: Optional[Room]
+    groups: Tuple[Optional[Group], ...]
+    theme: str
+    change: Optional[Change]
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any], timetable: "Timetable") -> "Atom":
+        change = data.get("Change")
+        hour_id = data.get("HourId")
+        return cls(
+            hour_id,
+            timetable.hours.get(hour_id),
+            timetable.subjects.get(data.get("SubjectId")),
+            timetable.teachers.get(data.get("TeacherId")),
+            timetable.rooms.get(data.get("RoomId")),
+            tuple(timetable.groups.get(group_id) for group_id in data.get("GroupIds") or ()),
+            data.get("Theme", ""),
+            Change(_s(change.get("ChangeType")), change.get("Description", "")) if change else None,
+        )
+
+
+class TimetableDay(NamedTuple):
+    date: Optional[str]
+    day_of_week: Optional[int]
+    day: Any
+    atoms: Tuple[Atom, ...]
+
+
+class Timetable(NamedTuple):
+    """Aktuální (jeden týden) nebo stálý rozvrh s lookup tabulkami"""
+    hours: Dict[Any, Hour]
+    subjects: Dict[Any, Subject]
+    teachers: Dict[Any, Teacher]
+    rooms: Dict[Any, Room]
+    groups: Dict[Any, Group]
+    days: Tuple[TimetableDay, ...]
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "Timetable":
+        """
+        Převede už dekódovanou odpověď rozvrhu do modelu. Nejdřív se načtou
+        referenční tabulky, potom dny; surová data dne se uvolní hned po jeho
+        převodu, ne až s celou odpovědí.
+
+        Parser přebírá vlastnictví odpovědi: klíč Days z data odebere a jeho
+        seznam spotřebuje. Volající, který surová data ještě potřebuje, musí
+        předat kopii.
+        """
+        timetable = cls(
+            {hour.id: hour for hour in map(Hour.from_api, data.get("Hours", []))},
+            {subject.id: subject for subject in map(Subject.from_api, data.get("Subjects", []))},
+            {teacher.id: teacher for teacher in map(Teacher.from_api, data.get("Teachers", []))},
+            {room.id: room for room in map(Room.from_api, data.get("Rooms", []))},
+            {group.id: group for group in map(Group.from_api, data.get("Groups", []))},
+            (),
+        )
+        raw_days = data.pop("Days", None) or []
+        raw_days.reverse()
+        days = []
+        while raw_days:
+            day = raw_days.pop()
+            days.append(TimetableDay(
+                (day.get("Date") or "")[:10] or None,
+                day.get("DayOfWeek"),
+                day.get("Day"),
+                tuple(Atom.from_api(atom, timetable) for atom in day.get("Atoms", [])),
+            ))
+        return timetable._replace(days=tuple(days))
+
+
+class Mark(NamedTuple):
+    id: Any
+    mark_date: Optional[str]
+    edit_date: Optional[str]
+    caption: Optional[str]
+    theme: Optional[str]
+    mark_text: Optional[str]
+    teacher_id: Any
+    type: Optional[str]
+    type_note: Optional[str]
+    weight: Any
+    subject_id: Any
+    is_new: bool
+    is_points: bool
+    calculated_mark_text: Optional[str]
+    class_rank_text: Optional[str]
+    points_text: Optional[str]
+    max_points: Any
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "Mark":
+        return cls(
+            data.get("Id"),
+            data.get("MarkDate"),
+            data.get("EditDate"),
+            data.get("Caption"),
+            data.get("Theme"),
+            _s(data.get("MarkText")),
+            _s(data.get("TeacherId")),
+            _s(data.get("Type")),
+            _s(data.get("TypeNote")),
+            data.get("Weight"),
+            _s(data.get("SubjectId")),
+            data.get("IsNew", False),
+            data.get("IsPoints", False),
+            _s(data.get("CalculatedMarkText")),
+            data.get("ClassRankText"),
+            data.get("PointsText"),
+            data.get("MaxPoints", 0),
+        )
+
+
+class SubjectMarks(NamedTuple):
+    """Známky a průměr jednoho předmětu"""
+    subject: Subject
+    average_text: Optional[str]
+    temporary_mark: Optional[str]
+    subject_note: Optional[str]
+    temporary_mark_note: Optional[str]
+    points_only: bool
+    prediction_enabled: bool
+    marks: Tuple[Mark, ...]
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "SubjectMarks":
+        return cls(
+            Subject.from_api(data.get("Subject") or {}),
+            data.get("AverageText"),
+            data.get("TemporaryMark"),
+            data.get("SubjectNote"),
+            data.get("TemporaryMarkNote"),
+            data.get("PointsOnly", False),
+            data.get("MarkPredictionEnabled", False),
+            tuple(map(Mark.from_api, data.get("Marks", []))),
+        )
+
+
+class GradeBook(NamedTuple):
+    subjects: Tuple[SubjectMarks, ...]
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "GradeBook":
+        return cls(tuple(map(SubjectMarks.from_api, data.get("Subjects", []))))
+
+
+class AbsenceDay(NamedTuple):
+    date: Optional[str]
+    unsolved: int
+    ok: int
+    missed: int
+    late: int
+    soon: int
+    school: int
+    distance_teaching: int
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "AbsenceDay":
+        return cls(
+            data.get("Date", "").split("T")[0] if data.get("Date") else None,
+            data.get("Unsolved", 0),
+            data.get("Ok", 0),
+            data.get("Missed", 0),
+            data.get("Late", 0),
+            data.get("Soon", 0),
+            data.get("School", 0),
+            data.get("DistanceTeaching", 0),
+        )
+
+    @property
+    def total(self) -> int:
+        return (self.unsolved + self.ok + self.missed + self.late +
+                self.soon + self.school + self.distance_teaching)
+
+
+class AbsenceSubject(NamedTuple):
+    subject_name: str
+    lessons_count: int
+    base: int
+    late: int
+    soon: int
+    school: int
+    distance_teaching: int
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "AbsenceSubject":
+        return cls(
+            _s(data.get("SubjectName", "")),
+            data.get("LessonsCount", 0),
+            data.get("Base", 0),
+            data.get("Late", 0),
+            data.get("Soon", 0),
+            data.get("School", 0),
+            data.get("DistanceTeaching", 0),
+        )
+
+    @property
+    def percentage(self) -> float:
+        """Procento zameškaných hodin (základní absence, pozdní příchody a brzké odchody)"""
+        if self.lessons_count <= 0:
+            return 0
+        return round((self.base + self.late + self.soon) / self.lessons_count * 100, 2)
+
+
+class AbsenceReport(NamedTuple):
+    percentage_threshold: float
+    days: Tuple[AbsenceDay, ...]
+    subjects: Tuple[AbsenceSubject, ...]
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> "AbsenceReport":
+        return cls(
+            data.get("PercentageThreshold", 0),
+            tuple(map(AbsenceDay.from_api, data.get("Absences", []))),
+            tuple(map(AbsenceSubject.from_api, data.get("AbsencesPerSubject", []))),
+        )
+
+
+def model_size(model: Any) -> Dict[str, int]:
+    """Počet hodin, známek nebo dní absence v modelu (atributy spanů, viz tracing.py)"""
+    if isinstance(model, Timetable):
+        return {"days": len(model.days), "atoms": sum(len(day.atoms) for day in model.days)}
+    if isinstance(model, GradeBook):
+        return {"subjects": len(model.subjects), "marks": sum(len(subject.marks) for subject in model.subjects)}
+    if isinstance(model, AbsenceReport):
+        return {"days": len(model.days), "subjects": len(model.subjects)}
+    return {}
+
+
+# Převod odpovědí podle rodiny endpointu (viz cache.ENDPOINT_FAMILIES); parsery
+# dostávají čerstvě dekódovanou odpověď a smí ji měnit
+MODEL_PARSERS = {
+    "staly_rozvrh": Timetable.from_api,
+    "rozvrh": Timetable.from_api,
+    "znamky": GradeBook.from_api,
+    "absence": AbsenceReport.from_api,
+}
@@ -0,0 +1,147 @@
+"""
+Profilování vybraných volání nástrojů na živém provozu.
+Pro nástroj lze naplánovat profilování příštích N volání - při startu proměnnou
+BAKALARI_PROFILE (např. "staly_rozvrh:5,znamky") nebo za běhu skrytým nástrojem
+profilovani (jen s BAKALARI_ADMIN_TOKEN). Volání běží pod cProfile, výsledek se
+uloží jako .prof soubor (pstats, snakeviz) do BAKALARI_PROFILE_DIR a souhrn
+nejdražších funkcí zůstane v paměti.
+
+cProfile měří vše, co během volání běží v event loopu, tedy i souběžná volání
+jiných nástrojů; profiluje se proto vždy nejvýše jedno volání najednou.
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import Optional, Dict, Any, List
+
+# Počet funkcí v souhrnu a počet uchovávaných souhrnů
+TOP_FUNCTIONS = 20
+MAX_RESULTS = 10
+
+
+def _short_path(filename: str) -> str:
+    # Stačí poslední dvě části cesty (balíček/modul.py)
+    parts = filename.replace("\\", "/").split("/")
+    return "/".join(parts[-2:])
+
+
+def summarize(stats: pstats.Stats, limit: int = TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+    """
+    Nejdražší funkce podle vlastního času. Kumulativnímu času by vévodily rámce
+    event loopu (_run_once, Context.run), které obalují celé volání.
+    """
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [
+        {
+            "funkce": f"{_short_path(filename)}:{line}({name})",
+            "volani": calls,
+            "vlastni_ms": round(own * 1000, 3),
+            "kumulativni_ms": round(cumulative * 1000, 3),
+        }
+        for (filename, line, name), (_, calls, own, cumulative, _) in rows
+    ]
+
+
+class _NoopProfile:
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NOOP = _NoopProfile()
+
+
+class _ActiveProfile:
+    def __init__(self, profiler: "ToolProfiler", tool: str):
+        self.owner = profiler
+        self.tool = tool
+        self.profile = cProfile.Profile()
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+        self.profile.enable()
+
+    def __exit__(self, *exc_info) -> None:
+        self.profile.disable()
+        self.owner.finish(self.tool, self.profile, time.perf_counter() - self.start)
+
+
+class ToolProfiler:
+    """Naplánovaná profilování podle nástroje a souhrny posledních výsledků"""
+
+    def __init__(self, output_dir: str, planned: Optional[Dict[str, int]] = None):
+        self.output_dir = output_dir
+        self.planned: Dict[str, int] = dict(planned or {})
+        self.results: "deque[Dict[str, Any]]" = deque(maxlen=MAX_RESULTS)
+        self.active = False
+        self.profiled = 0
+
+    @classmethod
+    def from_env(cls) -> "ToolProfiler":
+        """Profiler s plánem z BAKALARI_PROFILE ("nastroj[:pocet],...") a adresářem BAKALARI_PROFILE_DIR"""
+        output_dir = os.environ.get("BAKALARI_PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "bakalari-profiles")
+        planned = {}
+        for item in os.environ.get("BAKALARI_PROFILE", "").split(","):
+            name, _, count = item.strip().partition(":")
+            if name:
+                planned[name] = int(count) if count else 1
+        return cls(output_dir, planned)
+
+    def schedule(self, tool: str, count: int) -> None:
+        """Naplánuje profilování příštích count volání nástroje (0 plán zruší)"""
+        if count > 0:
+            self.planned[tool] = count
+        else:
+            self.planned.pop(tool, None)
+
+    def profile(self, tool: str):
+        """Kontextový manažer volání; profiluje, jen pokud je pro nástroj naplánováno"""
+        if not self.planned or self.active or tool not in self.planned:
+            return _NOOP
+        self.planned[tool] -= 1
+        if self.planned[tool] <= 0:
+            del self.planned[tool]
+        self.active = True
+        return _ActiveProfile(self, tool)
+
+    def finish(self, tool: str, profile: cProfile.Profile, duration: float) -> None:
+        self.active = False
+        self.profiled += 1
+        stats = pstats.Stats(profile)
+        path = None
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f"{tool}-{time.strftime('%Y%m%d-%H%M%S')}-{self.profiled}.prof")
+            stats.dump_stats(path)
+        except OSError as e:
+            print(f"Uložení profilu {tool} selhalo: {e}", file=sys.stderr)
+            path = None
+        self.results.append({
+            "nastroj": tool,
+            "cas": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "doba_ms": round(duration * 1000, 3),
+            "volani_funkci": stats.total_calls,
+            "soubor": path,
+            "funkce": summarize(stats),
+        })
+        print(f"Profil volání {tool} ({duration * 1000:.1f} ms) uložen do {path}", file=sys.stderr)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "naplanovano": dict(self.planned),
+            "adresar": self.output_dir,
+            "vysledky": list(self.results),
+        }
+
+
+# Profiler procesu a token pro skrytý nástroj profilovani (bez tokenu se nástroj neregistruje)
+profiler = ToolProfiler.from_env()
+ADMIN_TOKEN = os.environ.get("BAKALARI_ADMIN_TOKEN") or None
@@ -0,0 +1,169 @@
+"""
+Omezení zátěže serverů škol.
+Každý server Bakalářů (server_url) má vlastní limit rychlosti požadavků (token
+bucket) a nejvyšší počet současně probíhajících požadavků. Limity sdílí všechny
+účty téže školy. Požadavek nad limit čeká ve frontě nejvýše queue_timeout
+sekund, pak se odmítne výjimkou BakalariRateLimitError místo neomezeného čekání.
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, AsyncIterator
+
+from .errors import BakalariRateLimitError
+
+
+class TokenBucket:
+    """
+    Token bucket s rezervací: každý požadavek si vezme jeden token, při nedostatku
+    jde stav do záporu a požadavek čeká, dokud se jeho token nedoplní. Čekající
+    se tak obslouží v pořadí, v jakém přišli.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Zarezervuje jeden token a vrátí, kolik sekund je třeba počkat"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def cancel(self) -> None:
+        """Vrátí token rezervace, na kterou se nakonec nečekalo"""
+        self.tokens += 1
+
+
+class UpstreamLimiter:
+    """Limit rychlosti a souběhu požadavků na jeden server školy"""
+
+    def __init__(
+        self,
+        server_url: str,
+        rate: float = 10.0,
+        burst: int = 20,
+        max_in_flight: int = 8,
+        queue_timeout: float = 10.0,
+    ):
+        self.server_url = server_url
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self.max_in_flight = max_in_flight
+        self.queue_timeout = queue_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queued = 0
+        self.requests = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @classmethod
+    def from_env(cls, server_url: str) -> "UpstreamLimiter":
+        """Vytvoří limiter s nastavením z proměnných prostředí BAKALARI_RATE_*, BAKALARI_MAX_IN_FLIGHT a BAKALARI_QUEUE_TIMEOUT"""
+        return cls(
+            server_url,
+            rate=float(os.environ.get("BAKALARI_RATE_LIMIT", "10")),
+            burst=int(os.environ.get("BAKALARI_RATE_BURST", "20")),
+            max_in_flight=int(os.environ.get("BAKALARI_MAX_IN_FLIGHT", "8")),
+            queue_timeout=float(os.environ.get("BAKALARI_QUEUE_TIMEOUT", "10")),
+        )
+
+    def _reject(self, retry_after: float, reason: str) -> BakalariRateLimitError:
+        self.rejected += 1
+        return BakalariRateLimitError(
+            f"Server školy je přetížen ({reason}), zkus to znovu za {retry_after:.1f} s",
+            retry_after=retry_after,
+        )
+
+    async def _acquire_slot(self, deadline: float) -> None:
+        if self.max_in_flight <= 0:
+            return
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            raise self._reject(1.0, f"nejvýše {self.max_in_flight} souběžně probíhajících požadavků")
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Počká na volný token a volné místo pro požadavek (nejvýše queue_timeout sekund).
+        Při překročení fronty vyvolá BakalariRateLimitError.
+        """
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+        self.requests += 1
+        self.queued += 1
+        try:
+            if self.bucket is not None:
+                wait = self.bucket.reserve()
+                if wait > self.queue_timeout:
+                    self.bucket.cancel()
+                    raise self._reject(wait, f"limit {self.bucket.rate:g} požadavků/s")
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            await self._acquire_slot(deadline)
+        finally:
+            self.queued -= 1
+
+        waited = time.monotonic() - start
+        if waited > 0.001:
+            self.delayed += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if self._semaphore is not None and self.max_in_flight > 0:
+                self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        admitted = self.requests - self.rejected - self.queued
+        return {
+            "limit_za_s": self.bucket.rate if self.bucket is not None else None,
+            "zasobnik": self.bucket.burst if self.bucket is not None else None,
+            "max_soubeznych": self.max_in_flight,
+            "fronta_timeout_s": self.queue_timeout,
+            "probihajici": self.in_flight,
+            "ve_fronte": self.queued,
+            "pozadavky": self.requests,
+            "zdrzeno": self.delayed,
+            "odmitnuto": self.rejected,
+            "cekani_prumer_ms": round(self.wait_total / admitted * 1000, 2) if admitted > 0 else 0.0,
+            "cekani_max_ms": round(self.wait_max * 1000, 2),
+        }
+
+
+class ServerLimiters:
+    """
+    Limitery indexované server_url. Limiter žije, dokud ho používá některý
+    klient (slabé reference), takže se uvolní spolu s posledním účtem školy.
+    """
+
+    def __init__(self):
+        self._limiters: "weakref.WeakValueDictionary[str, UpstreamLimiter]" = weakref.WeakValueDictionary()
+
+    def for_server(self, server_url: str) -> UpstreamLimiter:
+        limiter = self._limiters.get(server_url)
+        if limiter is None:
+            limiter = UpstreamLimiter.from_env(server_url)
+            self._limiters[server_url] = limiter
+        return limiter
+
+    def stats(self) -> Dict[str, Any]:
+        return {url: limiter.stats() for url, limiter in list(self._limiters.items())}
@@ -0,0 +1,65 @@
+"""
+Opakování idempotentních požadavků při přechodných chybách serveru školy.
+Čekání mezi pokusy roste exponenciálně a má náhodný rozptyl (full jitter),
+aby se souběžní klienti po výpadku nevraceli na server všichni najednou.
+"""
+
+import os
+import random
+from typing import Optional, Dict, Any
+
+# Odpovědi, které značí přetížení nebo dočasný výpadek serveru
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+# Metody, které lze bezpečně zopakovat
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD"))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Hodnota hlavičky Retry-After v sekundách (datum se nepodporuje)"""
+    try:
+        return max(float(value), 0.0) if value else None
+    except ValueError:
+        return None
+
+
+class RetryPolicy:
+    """Počet pokusů a exponenciální čekání mezi nimi"""
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 5.0):
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """Vytvoří politiku s nastavením z proměnných prostředí BAKALARI_RETRY_*"""
+        return cls(
+            attempts=int(os.environ.get("BAKALARI_RETRY_ATTEMPTS", "3")),
+            base_delay=float(os.environ.get("BAKALARI_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.environ.get("BAKALARI_RETRY_MAX_DELAY", "5")),
+        )
+
+    def attempts_for(self, method: str) -> int:
+        """Neidempotentní požadavky se neopakují"""
+        return self.attempts if method in IDEMPOTENT_METHODS else 1
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Čekání po neúspěšném pokusu číslo attempt (od 1). Pokud server poslal
+        Retry-After, čeká se alespoň tak dlouho (nejvýše však max_delay).
+        """
+        self.retries += 1
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pokusu": self.attempts,
+            "zakladni_cekani_s": self.base_delay,
+            "max_cekani_s": self.max_delay,
+            "opakovano": self.retries,
+        }
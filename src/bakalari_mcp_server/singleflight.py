@@ -0,0 +1,48 @@
+"""
+Slučování souběžných identických požadavků (single-flight).
+Pokud na stejný klíč už běží požadavek, další volající nečekají na vlastní
+síťové volání, ale sdílí výsledek (nebo výjimku) toho probíhajícího.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Registr probíhajících volání indexovaný klíčem"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def _done(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Výjimku označíme jako převzatou i když všichni volající mezitím skončili
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Spustí fn() pro daný klíč, nebo se připojí k již běžícímu volání.
+        Zrušení jednoho volajícího neruší sdílené volání pro ostatní.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            self.executed += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "probihajici": len(self._calls),
+            "provedeno": self.executed,
+            "sdileno": self.shared,
+        }
@@ -0,0 +1,77 @@
+"""
+Cache dekódovaných týdnů aktuálního rozvrhu.
+Endpoint /api/3/timetable/actual vrací vždy celý týden; ten se dekóduje jednou
+(hodiny se převedou do modelu a seřadí jen jednou, viz models.py) a hodiny
+jednotlivých dní jsou pak dostupné přímo podle ISO data.
+"""
+
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Optional, Dict, Any, Tuple
+
+from .models import Atom, Teacher, Timetable
+
+
+def week_start(day: date) -> date:
+    """Pondělí týdne, do kterého patří zadaný den"""
+    return day - timedelta(days=day.weekday())
+
+
+class DecodedWeek:
+    """Dekódovaný týden rozvrhu indexovaný ISO datem (YYYY-MM-DD)"""
+
+    __slots__ = ("days", "days_of_week", "teachers", "decoded_at")
+
+    def __init__(self, teachers: Optional[Dict[Any, Teacher]] = None):
+        self.days: Dict[str, Tuple[Atom, ...]] = {}
+        self.days_of_week: Dict[str, int] = {}
+        self.teachers = teachers or {}
+        self.decoded_at = time.time()
+
+    def add_day(self, iso_date: str, day_of_week: int, hodiny: Tuple[Atom, ...]) -> None:
+        self.days[iso_date] = hodiny
+        self.days_of_week[iso_date] = day_of_week
+
+
+class WeekCache:
+    """
+    LRU cache dekódovaných týdnů, klíčem je pondělí týdne. Dekódovaný týden
+    platí, dokud cache odpovědí vrací stejný model rozvrhu, ze kterého vznikl -
+    o čerstvosti dat tak rozhoduje jen cache odpovědí.
+    """
+
+    def __init__(self, max_weeks: int = 16, enabled: bool = True):
+        self.max_weeks = max_weeks
+        self.enabled = enabled
+        self._weeks: "OrderedDict[date, Tuple[Timetable, DecodedWeek]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, monday: date, source: Timetable) -> Optional[DecodedWeek]:
+        """Vrátí dekódovaný týden, pokud byl dekódován právě z modelu source"""
+        if not self.enabled:
+            return None
+        item = self._weeks.get(monday)
+        if item is None or item[0] is not source:
+            self.misses += 1
+            return None
+        self._weeks.move_to_end(monday)
+        self.hits += 1
+        return item[1]
+
+    def put(self, monday: date, source: Timetable, week: DecodedWeek) -> None:
+        if not self.enabled:
+            return
+        self._weeks[monday] = (source, week)
+        self._weeks.move_to_end(monday)
+        while len(self._weeks) > self.max_weeks:
+            self._weeks.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tydny": len(self._weeks),
+            "max_tydnu": self.max_weeks,
+            "zasahy": self.hits,
+            "vypadky": self.misses,
+        }
@@ -0,0 +1,246 @@
+"""
+Správa životního cyklu přístupového tokenu Bakaláři API.
+Eviduje expiraci tokenu z odpovědi přihlášení (expires_in) a obnovuje ho
+na pozadí krátce před vypršením, takže běžné požadavky na přihlášení nečekají.
+Přihlášení prochází limitem zátěže a jističem serveru školy stejně jako ostatní
+požadavky, takže ani chyba v plánování nezahltí přihlašovací endpoint školy.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from typing import Optional, Dict, Any
+from urllib import parse
+
+import aiohttp
+
+from . import metrics, tracing
+from .breaker import CircuitBreaker
+from .errors import BakalariAuthError, BakalariAPIError
+from .http_pool import HttpPool
+from .ratelimit import UpstreamLimiter
+from .retry import RETRY_STATUSES
+
+# Nejkratší odstup obnovení na pozadí od přihlášení (v sekundách)
+MIN_REFRESH_DELAY = 5.0
+# Nejdelší čekání před dalším pokusem o neúspěšné obnovení na pozadí (v sekundách)
+MAX_REFRESH_RETRY_DELAY = 60.0
+
+
+class TokenManager:
+    """
+    Drží access/refresh token a čas jeho expirace.
+    Obnovení běží pod zámkem, takže současně probíhá nejvýše jedno přihlášení.
+    """
+
+    def __init__(
+        self,
+        pool: HttpPool,
+        server_url: Optional[str] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        refresh_margin: float = 60.0,
+    ):
+        self.pool = pool
+        self.server_url = server_url
+        self.username = username
+        self.password = password
+        self.refresh_margin = refresh_margin
+        self.access_token: Optional[str] = None
+        self.refresh_token: Optional[str] = None
+        self.expires_at: Optional[float] = None
+        self.lifetime: Optional[float] = None
+        self.limiter: Optional[UpstreamLimiter] = None
+        self.breaker: Optional[CircuitBreaker] = None
+        # Server přihlašovací údaje aspoň jednou přijal (viz BakalariClient.authenticate)
+        self.verified = False
+        self._lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.counters = {
+            "prihlaseni_heslem": 0,
+            "obnoveni_refresh_tokenem": 0,
+            "obnoveni_na_pozadi": 0,
+            "selhani": 0,
+            "selhani_na_pozadi": 0,
+        }
+
+    @classmethod
+    def from_env(cls, pool: HttpPool) -> "TokenManager":
+        """Vytvoří správce tokenů; BAKALARI_TOKEN_REFRESH_MARGIN určuje předstih obnovení v sekundách"""
+        return cls(pool, refresh_margin=float(os.environ.get("BAKALARI_TOKEN_REFRESH_MARGIN", "60")))
+
+    def configure(
+        self,
+        server_url: str,
+        username: Optional[str],
+        password: Optional[str],
+        limiter: UpstreamLimiter,
+        breaker: CircuitBreaker,
+    ) -> None:
+        """Nastaví server, jeho limit zátěže a jistič a přihlašovací údaje; dosavadní tokeny zahodí"""
+        self.server_url = server_url
+        self.limiter = limiter
+        self.breaker = breaker
+        self.username = username
+        self.password = password
+        self.access_token = None
+        self.refresh_token = None
+        self.expires_at = None
+        self.lifetime = None
+        self.verified = False
+
+    def _count(self, event: str) -> None:
+        self.counters[event] += 1
+        metrics.auth_events.inc(event)
+
+    def is_valid(self) -> bool:
+        """True pokud máme access token, který (podle expires_in) ještě nevypršel"""
+        if not self.access_token:
+            return False
+        return self.expires_at is None or time.monotonic() < self.expires_at
+
+    async def token(self) -> str:
+        """Vrátí platný access token; přihlásí se jen pokud žádný platný token nemáme"""
+        if self.is_valid():
+            return self.access_token
+        return await self.refresh()
+
+    async def refresh(self, stale_token: Optional[str] = None, background: bool = False) -> str:
+        """
+        Obnoví access token. Pokud je zadán stale_token (token, který server odmítl)
+        a mezitím už ho jiné volání nahradilo, vrátí se rovnou nový token.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        with tracing.span("auth", background=background) as span:
+            async with self._lock:
+                if self.access_token != stale_token and self.is_valid():
+                    span.set(shared=True)
+                    return self.access_token
+                await self._obtain()
+                if background:
+                    self._count("obnoveni_na_pozadi")
+                return self.access_token
+
+    async def _obtain(self) -> None:
+        # Nejdřív zkusíme refresh token, při jeho odmítnutí se přihlásíme heslem
+        if self.refresh_token:
+            try:
+                await self._login({"grant_type": "refresh_token", "refresh_token": self.refresh_token})
+                self._count("obnoveni_refresh_tokenem")
+                return
+            except BakalariAuthError:
+                self.refresh_token = None
+                if not (self.username and self.password):
+                    self._count("selhani")
+                    raise
+        if not (self.username and self.password):
+            self._count("selhani")
+            raise BakalariAuthError("Nejsou k dispozici přihlašovací údaje")
+        try:
+            await self._login({"grant_type": "password", "username": self.username, "password": self.password})
+        except BakalariAuthError:
+            self._count("selhani")
+            raise
+        self._count("prihlaseni_heslem")
+
+    async def _login(self, grant: Dict[str, str]) -> Dict[str, Any]:
+        if not self.server_url:
+            raise BakalariAuthError("Server URL není nastaven")
+
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        login_data = parse.urlencode({"client_id": "ANDR", **grant})
+        login_url = f"{self.server_url}/api/login"
+
+        self.breaker.check()
+        session = await self.pool.session()
+        async with self.limiter.slot():
+            start = time.perf_counter()
+            status = "chyba_spojeni"
+            try:
+                async with session.post(login_url, data=login_data, headers=headers) as response:
+                    status = str(response.status)
+                    self._record(response.status not in RETRY_STATUSES)
+                    if response.status == 200:
+                        data = await response.json()
+                        self.access_token = data.get("access_token")
+                        self.refresh_token = data.get("refresh_token") or self.refresh_token
+                        expires_in = data.get("expires_in")
+                        self.lifetime = float(expires_in) if expires_in else None
+                        self.expires_at = time.monotonic() + self.lifetime if self.lifetime else None
+                        self.verified = True
+                        self._schedule_refresh()
+                        return data
+                    elif response.status == 400:
+                        error_data = await response.json(content_type=None)
+                        raise BakalariAuthError(f"Chyba přihlášení: {error_data.get('error_description', 'Neznámá chyba')}")
+                    else:
+                        raise BakalariAuthError(f"Chyba HTTP {response.status}")
+            except asyncio.TimeoutError:
+                status = "timeout"
+                self._record(False)
+                raise BakalariAuthError("Vypršel časový limit přihlášení")
+            except aiohttp.ClientError as e:
+                self._record(False)
+                raise BakalariAuthError(f"Chyba připojení: {e}")
+            finally:
+                metrics.upstream_duration.observe(time.perf_counter() - start, "/api/login", status)
+
+    def _record(self, success: bool) -> None:
+        if success:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is not None and self._refresh_task is not asyncio.current_task():
+            self._refresh_task.cancel()
+        self._refresh_task = None
+        if self.expires_at is None:
+            return
+        # U krátce platných tokenů by celý předstih spadl na okamžité obnovení
+        # a každé přihlášení by hned naplánovalo další; předstih je proto nejvýše
+        # polovina platnosti a obnovení nejdřív za MIN_REFRESH_DELAY
+        margin = min(self.refresh_margin, self.lifetime / 2) if self.lifetime else self.refresh_margin
+        delay = max(self.expires_at - time.monotonic() - margin, MIN_REFRESH_DELAY)
+        self._refresh_task = asyncio.ensure_future(self._refresh_later(delay, self.access_token))
+
+    async def _refresh_later(self, delay: float, token: str) -> None:
+        tracing.detach()
+        attempt = 0
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                # Pokud už token obnovil někdo jiný, refresh() nic neudělá
+                await self.refresh(stale_token=token, background=True)
+                return
+            except (BakalariAuthError, BakalariAPIError) as e:
+                self._count("selhani_na_pozadi")
+                # Další pokus s exponenciálním čekáním, nejdřív za dobu z Retry-After
+                # (limit zátěže, jistič); jen pokud ještě stihne platnost tokenu
+                attempt += 1
+                delay = min(MIN_REFRESH_DELAY * 2 ** attempt, MAX_REFRESH_RETRY_DELAY)
+                delay = max(delay, getattr(e, "retry_after", 0.0))
+                remaining = self.expires_at - time.monotonic() if self.expires_at is not None else 0.0
+                if self.access_token != token or delay >= remaining:
+                    print(f"Obnovení tokenu na pozadí selhalo: {e}; token se obnoví až při dalším volání", file=sys.stderr)
+                    return
+                print(f"Obnovení tokenu na pozadí selhalo: {e}; další pokus za {delay:.0f} s", file=sys.stderr)
+
+    async def close(self) -> None:
+        """Zastaví plánované obnovení tokenu"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        remaining = None
+        if self.access_token and self.expires_at is not None:
+            remaining = round(self.expires_at - time.monotonic(), 1)
+        return {
+            "prihlaseno": self.access_token is not None,
+            "platnost_zbyva_s": remaining,
+            "obnoveni_naplanovano": self._refresh_task is not None and not self._refresh_task.done(),
+            **self.counters,
+        }
@@ -0,0 +1,313 @@
+"""
+Trasování volání nástrojů.
+Každé volání nástroje je kořenový span, pod kterým vznikají spany jednotlivých
+fází: přihlášení (auth), požadavek přes cache (request), HTTP požadavek na server
+školy (upstream), dekódování odpovědi (decode), sestavení týdne rozvrhu (lookup)
+a serializace výsledku (serialize). Spany nesou dobu a atributy (endpoint,
+velikost odpovědi, počet hodin nebo známek, stav cache).
+
+Trasování je ve výchozím stavu vypnuté a span() pak nic nestojí. Zapíná se
+proměnnými prostředí: BAKALARI_TRACE_FILE (span na řádek do JSON lines souboru)
+a/nebo BAKALARI_TRACE_OTLP_ENDPOINT (OTLP/HTTP JSON, např. http://collector:4318).
+BAKALARI_TRACE_SLOW_MS exportuje jen volání delší než zadaný počet milisekund.
+"""
+
+import asyncio
+import json
+import os
+import secrets
+import sys
+import time
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List, Sequence
+
+import aiohttp
+
+SERVICE_NAME = "bakalari-mcp"
+
+
+class Trace:
+    """Spany jednoho volání nástroje; exportují se, když skončí kořenový span"""
+
+    __slots__ = ("trace_id", "spans", "exported")
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List["Span"] = []
+        # None = kořen ještě běží, False = volání bylo rychlé a neexportuje se
+        self.exported: Optional[bool] = None
+
+
+class Span:
+    """Jedna fáze volání s dobou trvání a atributy"""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    recording = True
+
+    def __init__(self, name: str, trace: Trace, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Span jako jeden řádek JSON lines souboru"""
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Span ve tvaru OTLP/JSON (ResourceSpans -> ScopeSpans -> spans)"""
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            span["status"] = {"code": 2, "message": self.error}
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class _NoopSpan:
+    """Span vypnutého trasování - atributy zahodí"""
+
+    recording = False
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+class _NoopContext:
+    def __enter__(self) -> _NoopSpan:
+        return NOOP_SPAN
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+_NOOP_CONTEXT = _NoopContext()
+
+_current: ContextVar[Optional[Span]] = ContextVar("bakalari_span", default=None)
+
+
+class JsonlExporter:
+    """Zapisuje spany do souboru, jeden JSON objekt na řádek"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def export(self, spans: Sequence[Span]) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        for span in spans:
+            self._file.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+
+    async def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class OtlpExporter:
+    """
+    Posílá spany OTLP/HTTP s JSON kódováním na {endpoint}/v1/traces (OpenTelemetry
+    Collector, Jaeger, Tempo). Spany se sbírají a odesílají po dávkách na pozadí.
+    """
+
+    def __init__(self, endpoint: str, flush_interval: float = 2.0, max_batch: int = 512):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: List[Span] = []
+        self._flush_task: Optional[asyncio.Future] = None
+        self.sent = 0
+        self.failed = 0
+
+    def export(self, spans: Sequence[Span]) -> None:
+        self._pending.extend(spans)
+        if self._flush_task is None or self._flush_task.done():
+            delay = 0 if len(self._pending) >= self.max_batch else self.flush_interval
+            self._flush_task = asyncio.ensure_future(self._flush_later(delay))
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            payload = {
+                "resourceSpans": [{
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                    "scopeSpans": [{"scope": {"name": "bakalari_mcp_server"}, "spans": [span.to_otlp() for span in batch]}],
+                }]
+            }
+            try:
+                # Dávky jdou nejvýše jednou za flush_interval, session proto žije jen po dobu odeslání
+                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+                    async with session.post(self.url, json=payload) as response:
+                        if response.status >= 300:
+                            raise aiohttp.ClientError(f"HTTP {response.status}")
+                self.sent += len(batch)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Trasování nesmí ovlivnit obsluhu nástrojů - dávka se zahodí
+                self.failed += len(batch)
+                print(f"Export spanů na {self.url} selhal: {e}", file=sys.stderr)
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+
+class Tracer:
+    """Vytváří spany a po skončení volání je předá exportérům"""
+
+    def __init__(self, exporters: Sequence[Any], slow_ms: float = 0.0):
+        self.exporters = list(exporters)
+        self.slow_ms = slow_ms
+        self.traces = 0
+        self.exported = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["Tracer"]:
+        """Tracer podle BAKALARI_TRACE_FILE, BAKALARI_TRACE_OTLP_ENDPOINT a BAKALARI_TRACE_SLOW_MS (None = vypnuto)"""
+        exporters: List[Any] = []
+        if os.environ.get("BAKALARI_TRACE_FILE"):
+            exporters.append(JsonlExporter(os.environ["BAKALARI_TRACE_FILE"]))
+        if os.environ.get("BAKALARI_TRACE_OTLP_ENDPOINT"):
+            exporters.append(OtlpExporter(os.environ["BAKALARI_TRACE_OTLP_ENDPOINT"]))
+        if not exporters:
+            return None
+        return cls(exporters, slow_ms=float(os.environ.get("BAKALARI_TRACE_SLOW_MS", "0")))
+
+    def start(self, name: str, attributes: Dict[str, Any]) -> Span:
+        parent = _current.get()
+        if parent is None:
+            self.traces += 1
+            return Span(name, Trace(), None, attributes)
+        return Span(name, parent.trace, parent.span_id, attributes)
+
+    def finish(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        trace = span.trace
+        if span.parent_id is None:
+            trace.spans.append(span)
+            trace.exported = span.duration_ms >= self.slow_ms
+            if trace.exported:
+                self.exported += 1
+                self._export(trace.spans)
+            trace.spans = []
+        elif trace.exported is None:
+            trace.spans.append(span)
+        elif trace.exported:
+            # Úloha na pozadí (např. revalidace cache) doběhla po skončení volání
+            self._export([span])
+
+    def _export(self, spans: Sequence[Span]) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(spans)
+            except Exception as e:
+                print(f"Export spanů selhal: {e}", file=sys.stderr)
+
+    async def close(self) -> None:
+        for exporter in self.exporters:
+            await exporter.close()
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: Tracer, span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current.reset(self.token)
+        if exc is not None and not isinstance(exc, asyncio.CancelledError):
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        self.tracer.finish(self.span)
+
+
+# Tracer procesu (None = trasování vypnuto)
+tracer: Optional[Tracer] = Tracer.from_env()
+
+
+def span(name: str, **attributes: Any):
+    """
+    Kontextový manažer spanu fáze; vrací objekt s metodou set(**atributy).
+    Při vypnutém trasování vrací sdílený prázdný span.
+    """
+    if tracer is None:
+        return _NOOP_CONTEXT
+    return _SpanContext(tracer, tracer.start(name, attributes))
+
+
+def detach() -> None:
+    """
+    Odpojí aktuální úlohu na pozadí od volání, ve kterém vznikla (její spany
+    pak tvoří samostatnou stopu). Pro úlohy, které žijí déle než volání.
+    """
+    _current.set(None)
+
+
+async def close() -> None:
+    """Odešle rozpracované dávky a zavře exportéry (při ukončení serveru)"""
+    if tracer is not None:
+        await tracer.close()
+
+
+def stats() -> Optional[Dict[str, Any]]:
+    """Počty trasovaných a exportovaných volání (None, pokud je trasování vypnuté)"""
+    if tracer is None:
+        return None
+    return {
+        "volani": tracer.traces,
+        "exportovano": tracer.exported,
+        "prah_ms": tracer.slow_ms,
+        "exportery": [type(exporter).__name__ for exporter in tracer.exporters],
+    }